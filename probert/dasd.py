@@ -12,6 +12,7 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import asyncio
 import logging
 import os
 import platform
@@ -26,19 +27,23 @@ log = logging.getLogger('probert.dasd')
 
 
 def _dasd_view_dec_pattern(label):
-    return r"^{}\s+:\shex\s\w+\s+dec\s(?P<value>\d+)$".format(
-        re.escape(label))
+    return re.compile(
+        r"^{}\s+:\shex\s\w+\s+dec\s(?P<value>\d+)$".format(
+            re.escape(label)),
+        re.MULTILINE)
 
 
-DASD_FORMAT = r"^format\s+:.+\s+(?P<value>\w+\s\w+)$"
+DASD_FORMAT = re.compile(r"^format\s+:.+\s+(?P<value>\w+\s\w+)$",
+                         re.MULTILINE)
 DASD_BLKSIZE = _dasd_view_dec_pattern("blocksize")
 DASD_CYLINDERS = _dasd_view_dec_pattern("number of cylinders")
 DASD_TRACKS_PER_CYLINDER = _dasd_view_dec_pattern("tracks per cylinder")
-DASD_TYPE = r"^type\s+:\s(?P<value>[A-Za-z]+)\s*$"
+DASD_TYPE = re.compile(r"^type\s+:\s(?P<value>[A-Za-z]+)\s*$",
+                       re.MULTILINE)
 
 
 def find_val(regex, content):
-    m = re.search(regex, content, re.MULTILINE)
+    m = regex.search(content)
     if m is not None:
         return m.group("value")
 
@@ -97,7 +102,7 @@ def get_dasd_info(device):
     name = device.get('DEVNAME')
     device_id = device.get('ID_PATH', '').replace('ccw-', '')
 
-    dasdview_output = dasdview(name)
+    dasdview_output = dasdview(name) or ''
     diskfmt = disk_format(dasdview_output)
     blksize = find_val_int(DASD_BLKSIZE, dasdview_output)
     type = find_val(DASD_TYPE, dasdview_output)
@@ -147,37 +152,54 @@ async def probe(context=None, **kw):
 
     log.debug("found MAJOR for virtblk: %s", virtio_major)
 
+    def _probe_dasd(devname, id_path):
+        try:
+            return get_dasd_info({'DEVNAME': devname, 'ID_PATH': id_path})
+        except ValueError as e:
+            log.error('Error probing dasd device %s: %s', devname, e)
+            return None
+
+    def _probe_virtio(devname):
+        # a dasd can be passed to a VM via virtio, in which case
+        # there is no device id and dasdview/dasdmft do not work
+        # but it must still be formatted with vtoc, so we report
+        # it here. The only way I can find to detect such a device
+        # is that "fdasd -i" on the device is successful.
+        result = subprocess.run(
+            ['fdasd', '-i', devname],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        log.debug("fasd -i %s returned %s", devname, result.returncode)
+        if result.returncode == 0:
+            return {
+                'name': devname,
+                'type': 'virt',
+                }
+        return None
+
+    # udev devices are read here, on the event loop thread; only the
+    # device names go to the executor, where dasdview and fdasd each
+    # block on a subprocess side by side.
+    loop = asyncio.get_running_loop()
+    devnames = []
+    jobs = []
     for device in sane_block_devices(context):
         # ignore partitions
         if 'PARTN' in device:
             continue
+        devname = device['DEVNAME']
         # dasd devices have MAJOR 94
         if device['MAJOR'] == "94":
-            try:
-                dasd_info = get_dasd_info(device)
-            except ValueError as e:
-                log.error(
-                    'Error probing dasd device %s: %s', device['DEVNAME'], e)
-                dasd_info = None
-
-            if dasd_info:
-                dasds[device['DEVNAME']] = dasd_info
+            job = loop.run_in_executor(
+                None, _probe_dasd, devname, device.get('ID_PATH', ''))
         elif device['MAJOR'] == virtio_major:
-            # a dasd can be passed to a VM via virtio, in which case
-            # there is no device id and dasdview/dasdmft do not work
-            # but it must still be formatted with vtoc, so we report
-            # it here. The only way I can find to detect such a device
-            # is that "fdasd -i" on the device is successful.
-            result = subprocess.run(
-                ['fdasd', '-i', device['DEVNAME']],
-                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-            log.debug(
-                "fasd -i %s returned %s",
-                device['DEVNAME'], result.returncode)
-            if result.returncode == 0:
-                dasds[device['DEVNAME']] = {
-                    'name': device['DEVNAME'],
-                    'type': 'virt',
-                    }
+            job = loop.run_in_executor(None, _probe_virtio, devname)
+        else:
+            continue
+        devnames.append(devname)
+        jobs.append(job)
+
+    for devname, dasd_info in zip(devnames, await asyncio.gather(*jobs)):
+        if dasd_info:
+            dasds[devname] = dasd_info
 
     return dasds
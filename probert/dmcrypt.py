@@ -12,6 +12,7 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import asyncio
 import logging
 import subprocess
 
@@ -47,20 +48,25 @@ def dmsetup_info(devname):
     return info
 
 
-async def probe(context=None, report=False, **kw):
-    """ Probing for dm_crypt devices requires running dmsetup info commands
-        to collect how a particular dm-X device is composed.
-    """
+def _probe():
     # ignore supplied context, we need to read udev after scan/vgchange
     context = pyudev.Context()
 
     crypt_devices = {}
 
     # look for block devices with DM_UUID and CRYPT; these are crypt devices
-    for device in sane_block_devices(context):
+    for device in sane_block_devices(context, DM_UUID='CRYPT*'):
         if 'DM_UUID' in device and device['DM_UUID'].startswith('CRYPT'):
             devname = device['DEVNAME']
             dm_info = dmsetup_info(devname)
             crypt_devices[dm_info['name']] = dm_info
 
     return crypt_devices
+
+
+async def probe(context=None, report=False, **kw):
+    """ Probing for dm_crypt devices requires running dmsetup info commands
+        to collect how a particular dm-X device is composed.
+    """
+    return await asyncio.get_running_loop().run_in_executor(
+            None, _probe)
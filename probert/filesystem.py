@@ -26,9 +26,25 @@ from probert.utils import (
 
 log = logging.getLogger('probert.filesystems')
 
+# dumpe2fs -h:
+#   Block count:              20480
+#   Block size:               4096
+DUMPE2FS_BLOCK_INFO = re.compile(r'^Block (count|size):[ \t]+(\d+)$', re.M)
+# resize2fs -P:
+#   Estimated minimum size of the filesystem: 1696
+RESIZE2FS_MIN_BLOCKS = re.compile(
+    r'^Estimated minimum size of the filesystem: (\d+)$', re.M)
+# ntfsresize --info:
+#   Current volume size: 41939456 bytes (42 MB)
+#   ...
+#   You might resize at 2613248 bytes or 3 MB (freeing 39 MB).
+#   or
+#   ERROR: Volume is full. To shrink it, delete unused files.
+NTFS_VOLSIZE = re.compile(r'^Current volume size: ([0-9]+) bytes')
+NTFS_MINSIZE = re.compile(r'^You might resize at ([0-9]+) bytes')
+
 
 async def get_dumpe2fs_info(path):
-    ret = {}
     dumpe2fs = shutil.which('dumpe2fs')
     if dumpe2fs is None:
         log.debug('ext volume size not found: dumpe2fs not found')
@@ -37,17 +53,8 @@ async def get_dumpe2fs_info(path):
     if out is None:
         log.debug('ext volume size not found: dumpe2fs failure')
         return None
-    # Block count:              20480
-    # Block size:               4096
-    block_count_matcher = re.compile(r'^Block count:\s+(\d+)$')
-    block_size_matcher = re.compile(r'^Block size:\s+(\d+)$')
-    for line in out.splitlines():
-        m = block_count_matcher.fullmatch(line)
-        if m:
-            ret['block_count'] = int(m.group(1))
-        m = block_size_matcher.fullmatch(line)
-        if m:
-            ret['block_size'] = int(m.group(1))
+    ret = {'block_' + field: int(value)
+           for field, value in DUMPE2FS_BLOCK_INFO.findall(out)}
     if 'block_count' not in ret or 'block_size' not in ret:
         log.debug('ext volume size not found: unexpected output format')
         return None
@@ -55,7 +62,6 @@ async def get_dumpe2fs_info(path):
 
 
 async def get_resize2fs_info(path):
-    # Estimated minimum size of the filesystem: 1696
     resize2fs = shutil.which('resize2fs')
     if resize2fs is None:
         log.debug('ext volume size not found: resize2fs not found')
@@ -63,13 +69,10 @@ async def get_resize2fs_info(path):
     out = await arun([resize2fs, '-P', path])
     if out is None:
         return None
-    min_blocks_matcher = re.compile(
-        r'^Estimated minimum size of the filesystem: (\d+)$')
-    for line in out.splitlines():
-        m = min_blocks_matcher.fullmatch(line)
-        if m:
-            return {'min_blocks': int(m.group(1))}
-    return None
+    m = RESIZE2FS_MIN_BLOCKS.search(out)
+    if m is None:
+        return None
+    return {'min_blocks': int(m.group(1))}
 
 
 async def get_ext_sizing(device):
@@ -101,26 +104,18 @@ async def get_ntfs_sizing(device):
     if out is None:
         log.debug('ntfs volume size not found: ntfsresize failure')
         return None
-    # Sample input:
-    #   Current volume size: 41939456 bytes (42 MB)
-    #   ...
-    #   You might resize at 2613248 bytes or 3 MB (freeing 39 MB).
-    #   or
-    #   ERROR: Volume is full. To shrink it, delete unused files.
-    volsize_matcher = re.compile(r'^Current volume size: ([0-9]+) bytes')
-    minsize_matcher = re.compile(r'^You might resize at ([0-9]+) bytes')
-    volfull_matcher = re.compile(r'^ERROR: Volume is full.')
     ret = {}
     is_full = False
     for line in out.splitlines():
-        m = volsize_matcher.match(line)
-        if m:
-            ret['SIZE'] = int(m.group(1))
-        m = minsize_matcher.match(line)
-        if m:
-            ret['ESTIMATED_MIN_SIZE'] = int(m.group(1))
-        m = volfull_matcher.match(line)
-        if m:
+        if line.startswith('Current volume size:'):
+            m = NTFS_VOLSIZE.match(line)
+            if m:
+                ret['SIZE'] = int(m.group(1))
+        elif line.startswith('You might resize at'):
+            m = NTFS_MINSIZE.match(line)
+            if m:
+                ret['ESTIMATED_MIN_SIZE'] = int(m.group(1))
+        elif line.startswith('ERROR: Volume is full.'):
             is_full = True
     if 'SIZE' not in ret:
         log.debug('ntfs volume size not found: unexpected output format')
@@ -182,23 +177,23 @@ async def probe(context=None, enabled_probes=None, *, parallelize=False, **kw):
     need_fs_sizing = 'filesystem_sizing' in enabled_probes
 
     async def probe_filesystem(device):
-        # Ignore block major=1 (ramdisk) and major=7 (loopback)
-        # these won't ever be used in recreating storage on target systems.
-        if device['MAJOR'] not in ["1", "7"]:
-            fs_info = await get_device_filesystem(device, need_fs_sizing)
-            # The ID_FS_ udev values come from libblkid, which contains code to
-            # recognize lots of different things that block devices or their
-            # partitions can contain (filesystems, lvm PVs, bcache, ...).  We
-            # only want to report things that are mountable filesystems here,
-            # which libblkid conveniently tags with ID_FS_USAGE=filesystem.
-            # Swap is a bit of a special case because it is not a mountable
-            # filesystem in the usual sense, but subiquity still needs to
-            # generate mount actions for it.  Crypto is a disguised filesystem.
-            if fs_info.get("USAGE") in ("filesystem", "crypto") or \
-               fs_info.get("TYPE") == "swap":
-                filesystems[device['DEVNAME']] = fs_info
-
-    coroutines = [probe_filesystem(dev) for dev in sane_block_devices(context)]
+        fs_info = await get_device_filesystem(device, need_fs_sizing)
+        # The ID_FS_ udev values come from libblkid, which contains code to
+        # recognize lots of different things that block devices or their
+        # partitions can contain (filesystems, lvm PVs, bcache, ...).  We
+        # only want to report things that are mountable filesystems here,
+        # which libblkid conveniently tags with ID_FS_USAGE=filesystem.
+        # Swap is a bit of a special case because it is not a mountable
+        # filesystem in the usual sense, but subiquity still needs to
+        # generate mount actions for it.  Crypto is a disguised filesystem.
+        if fs_info.get("USAGE") in ("filesystem", "crypto") or \
+           fs_info.get("TYPE") == "swap":
+            filesystems[device['DEVNAME']] = fs_info
+
+    # Ignore block major=1 (ramdisk) and major=7 (loopback)
+    # these won't ever be used in recreating storage on target systems.
+    coroutines = [probe_filesystem(dev) for dev in sane_block_devices(context)
+                  if dev['MAJOR'] not in ("1", "7")]
 
     if parallelize:
         await asyncio.gather(*coroutines)
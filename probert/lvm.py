@@ -12,6 +12,7 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import asyncio
 import logging
 import json
 import os
@@ -50,16 +51,17 @@ def _lvm_report(cmd, report_key):
     try:
         result = subprocess.run(cmd, stdout=subprocess.PIPE,
                                 stderr=subprocess.DEVNULL)
-        output = result.stdout.decode('utf-8')
     except subprocess.CalledProcessError as e:
         log.error('Failed to probe LVM devices on system: %s', e)
         return []
 
+    output = result.stdout
     if not output:
         return []
 
     reports = {}
     try:
+        # json.loads detects and decodes the utf-8 bytes itself
         reports = json.loads(output)
     except json.decoder.JSONDecodeError as e:
         log.error('Failed to load LVM json report: %s', e)
@@ -147,18 +149,16 @@ def extract_lvm_volgroup(vg_name, report_data):
 
     devices = set()
     size = None
+    size_bytes = 0
     for report in report_data:
         if report['vg_name'] == vg_name:
             vg_size = report['vg_size']
-            # set size to the largest size we find
+            # set size to the largest size we find; parse each value once
+            # and compare integers, the first value seen wins a tie
             if vg_size:
-                # unset, take current value
-                if not size:
-                    size = vg_size
-                # on set but mismatched values, keep the larger
-                elif size != vg_size:
-                    if _int(vg_size) > _int(size):
-                        size = vg_size
+                vg_bytes = _int(vg_size)
+                if size is None or vg_bytes > size_bytes:
+                    size, size_bytes = vg_size, vg_bytes
             devices.add(report.get('pv_name'))
 
     if size is None:
@@ -169,32 +169,7 @@ def extract_lvm_volgroup(vg_name, report_data):
                       'size': size})
 
 
-async def probe(context=None, **kw):
-    """ Probing for LVM devices requires initiating a kernel level scan
-        of block devices to look for physical volumes, volume groups and
-        logical volumes.  Once detected, the prober will activate any
-        volume groups detected.
-
-        The prober will refresh the udev context which brings in addition
-        information relating to LVM devices.
-
-        This prober relies on udev detecting devices via the 'DM_UUID'
-        field and for each of such devices, the prober records the
-        logical volume.
-
-        For each logical volume, the prober determines the hosting
-        volume_group and records detailed information about the group
-        including members.  The process is repeated to determine the
-        underlying physical volumes that are used to construct a
-        volume group.
-
-        Care is taken to handle scenarios where physical volumes are
-        not yet allocated to a volume group (such as a linear VG).
-
-        On newer systems (Disco+) the lvm2 software stack provides
-        a rich reporting data dump in JSON format.  On systems with
-        older LVM2 stacks, the LVM probe may be incomplete.
-    """
+def _probe():
     # scan and activate lvm vgs/lvs
     lvm_scan()
     activate_volgroups()
@@ -207,7 +182,7 @@ async def probe(context=None, **kw):
     pvols = {}
     vg_report = probe_vgs_report()
 
-    for device in sane_block_devices(context):
+    for device in sane_block_devices(context, DM_UUID='LVM*'):
         if 'DM_UUID' in device and device['DM_UUID'].startswith('LVM'):
             (lv_id, new_lv) = extract_lvm_partition(device)
             if lv_id not in lvols:
@@ -217,15 +192,14 @@ async def probe(context=None, **kw):
                 continue
 
             vg_name = device['DM_VG_NAME']
-            (vg_id, new_vg) = extract_lvm_volgroup(vg_name, vg_report)
-            if vg_id not in vgroups:
-                vgroups[vg_id] = new_vg
-            else:
-                log.error('Found duplicate volume group: %s', vg_id)
+            # check before extracting so that each volume group is only
+            # built once, however many logical volumes it holds
+            if vg_name in vgroups:
+                log.error('Found duplicate volume group: %s', vg_name)
                 continue
-
-            if vg_id not in pvols:
-                pvols[vg_id] = new_vg['devices']
+            (vg_id, new_vg) = extract_lvm_volgroup(vg_name, vg_report)
+            vgroups[vg_id] = new_vg
+            pvols[vg_id] = new_vg['devices']
 
     lvm = {}
     if lvols:
@@ -236,3 +210,33 @@ async def probe(context=None, **kw):
         lvm.update({'volume_groups': vgroups})
 
     return lvm
+
+
+async def probe(context=None, **kw):
+    """ Probing for LVM devices requires initiating a kernel level scan
+        of block devices to look for physical volumes, volume groups and
+        logical volumes.  Once detected, the prober will activate any
+        volume groups detected.
+
+        The prober will refresh the udev context which brings in addition
+        information relating to LVM devices.
+
+        This prober relies on udev detecting devices via the 'DM_UUID'
+        field and for each of such devices, the prober records the
+        logical volume.
+
+        For each logical volume, the prober determines the hosting
+        volume_group and records detailed information about the group
+        including members.  The process is repeated to determine the
+        underlying physical volumes that are used to construct a
+        volume group.
+
+        Care is taken to handle scenarios where physical volumes are
+        not yet allocated to a volume group (such as a linear VG).
+
+        On newer systems (Disco+) the lvm2 software stack provides
+        a rich reporting data dump in JSON format.  On systems with
+        older LVM2 stacks, the LVM probe may be incomplete.
+    """
+    return await asyncio.get_running_loop().run_in_executor(
+            None, _probe)
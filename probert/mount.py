@@ -12,6 +12,7 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import asyncio
 import json
 import logging
 import subprocess
@@ -44,4 +45,5 @@ async def probe(context=None, **kw):
        dumps a JSON tree of detailed information about _all_
        mounts in the current linux system.
     """
-    return findmnt().get('filesystems', {})
+    mounts = await asyncio.get_running_loop().run_in_executor(None, findmnt)
+    return mounts.get('filesystems', {})
@@ -12,6 +12,7 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import asyncio
 from collections import namedtuple
 import logging
 import subprocess
@@ -38,21 +39,18 @@ def _extract_mpath_data(cmd, show_verb):
         return []
 
     mptype = MPATH_SHOW[show_verb]
+    nfields = len(mptype._fields)
     data = result.stdout.decode('utf-8')
     result = []
     for line in data.splitlines():
-        mp_dict = None
-        try:
-            field_vals = line.split(MP_SEP)
-            log.debug('Extracted multipath %s fields: %s',
-                      show_verb, field_vals)
-            mp_dict = mptype(*field_vals)._asdict()
-        except TypeError as e:
-            log.debug(
-                'Failed to parse multipath %s entry: %s: %s' % (show_verb,
-                                                                line, e))
-        if mp_dict:
-            result.append(mp_dict)
+        field_vals = line.split(MP_SEP)
+        if len(field_vals) != nfields:
+            log.debug('Failed to parse multipath %s entry: %s: '
+                      'expected %d fields, found %d', show_verb, line,
+                      nfields, len(field_vals))
+            continue
+        log.debug('Extracted multipath %s fields: %s', show_verb, field_vals)
+        result.append(mptype(*field_vals)._asdict())
 
     return result
 
@@ -69,6 +67,18 @@ def multipath_show_maps():
     return _extract_mpath_data(cmd, 'maps')
 
 
+def _probe():
+    results = {}
+    maps = multipath_show_maps()
+    if maps:
+        results.update({'maps': maps})
+    paths = multipath_show_paths()
+    if paths:
+        results.update({'paths': paths})
+
+    return results
+
+
 async def probe(context=None, **kw):
     """Query the multipath daemon for multipath maps and paths.
 
@@ -79,12 +89,5 @@ async def probe(context=None, **kw):
        This probe requires multipath module to be loaded and the multipath
        daemon to be running.
     """
-    results = {}
-    maps = multipath_show_maps()
-    if maps:
-        results.update({'maps': maps})
-    paths = multipath_show_paths()
-    if paths:
-        results.update({'paths': paths})
-
-    return results
+    return await asyncio.get_running_loop().run_in_executor(
+            None, _probe)
@@ -22,6 +22,11 @@ import subprocess
 
 log = logging.getLogger('probert.os')
 
+# Patterns used to parse os-prober output, compiled once at import.
+OSPROBER_PATH = re.compile(r'([/\w\d]+)(@(.+))?')
+OSPROBER_VERSION = re.compile('[0-9.]+')
+OSPROBER_SUFFIX = re.compile(r'\s*\(.*\).*')
+
 
 def _parse_osprober(lines):
     ret = {}
@@ -33,7 +38,7 @@ def _parse_osprober(lines):
         (path, _long, label, _type) = chunks
 
         # LP: #1265192, fix os-prober Windows EFI path
-        match = re.match(r'([/\w\d]+)(@(.+))?', path)
+        match = OSPROBER_PATH.match(path)
         if not match:
             log.debug(f'malformed osprober line: {line}')
             continue
@@ -41,12 +46,12 @@ def _parse_osprober(lines):
 
         version = None
         if label.startswith('Ubuntu'):
-            versions = [v for v in re.findall('[0-9.]+', _long) if v]
+            versions = [v for v in OSPROBER_VERSION.findall(_long) if v]
             if versions:
                 version = versions[0]
 
             # Get rid of the superfluous (development version) (11.04)
-            _long = re.sub(r'\s*\(.*\).*', '', _long)
+            _long = OSPROBER_SUFFIX.sub('', _long)
         else:
             _long = _long.replace(' (loader)', '')
 
@@ -18,7 +18,7 @@ class Prober():
         self._results = {}
 
     async def probe_all(self, *, parallelize=False):
-        await self.probe_storage()
+        await self.probe_storage(parallelize=parallelize)
         await self.probe_firmware()
         self.probe_network()
 
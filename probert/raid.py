@@ -12,6 +12,7 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import asyncio
 import logging
 import os
 import subprocess
@@ -96,14 +97,7 @@ def get_mdadm_array_members(md_device):
     return (sorted(actives), sorted(spares))
 
 
-async def probe(context=None, report=False, **kw):
-    """Initiate an mdadm assemble to awaken existing MDADM devices.
-       For each md block device, extract required information needed
-       to describe the array for recreation or reuse as needed.
-
-       mdadm tooling provides information about the raid type,
-       the members, the size, the name, uuids, metadata version.
-    """
+def _probe():
     mdadm_assemble()
 
     # ignore passed context, must read udev after assembling mdadm devices
@@ -153,3 +147,15 @@ async def probe(context=None, report=False, **kw):
             raids[devname] = cfg
 
     return raids
+
+
+async def probe(context=None, report=False, **kw):
+    """Initiate an mdadm assemble to awaken existing MDADM devices.
+       For each md block device, extract required information needed
+       to describe the array for recreation or reuse as needed.
+
+       mdadm tooling provides information about the raid type,
+       the members, the size, the name, uuids, metadata version.
+    """
+    return await asyncio.get_running_loop().run_in_executor(
+            None, _probe)
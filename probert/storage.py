@@ -18,8 +18,10 @@ import json
 import logging
 import pyudev
 import subprocess
+import sys
 
 from probert.utils import (
+    SECTOR_SIZE_BYTES,
     read_sys_block_size_bytes,
     sane_block_devices,
     udev_get_attributes,
@@ -29,6 +31,26 @@ from probert import (bcache, dasd, dmcrypt, filesystem, lvm, mount, multipath,
 
 log = logging.getLogger('probert.storage')
 
+_udev_context = None
+
+# marks a StorageInfo value which has not been looked up yet
+_UNSET = object()
+
+# udev properties whose values repeat across most block devices; sharing
+# one string per value keeps large device counts from piling up copies
+_INTERNED_PROPS = frozenset((
+    'DEVTYPE', 'MAJOR', 'SUBSYSTEM', 'ID_BUS', 'ID_TYPE', 'ID_FS_TYPE',
+    'ID_FS_USAGE', 'ID_PART_TABLE_TYPE', 'ID_PART_ENTRY_SCHEME',
+    ))
+
+
+def _get_context():
+    """ Return a process wide pyudev.Context, creating it on first use. """
+    global _udev_context
+    if _udev_context is None:
+        _udev_context = pyudev.Context()
+    return _udev_context
+
 
 class StorageInfo():
     ''' properties:
@@ -42,52 +64,65 @@ class StorageInfo():
         .is_virtual =
         .raw = {raw dictionary}
     '''
+    __slots__ = ('name', 'raw', 'type', 'size', '_vendor', '_model',
+                 '_serial', '_devpath', '_is_virtual')
+
     def __init__(self, probe_data):
         [self.name] = probe_data
         self.raw = probe_data.get(self.name)
 
         self.type = self.raw['DEVTYPE']
         self.size = int(self.raw['attrs']['size'])
+        self._vendor = self._model = self._serial = _UNSET
+        self._devpath = self._is_virtual = _UNSET
 
     def _get_hwvalues(self, keys):
         for key in keys:
-            try:
+            if key in self.raw:
                 return self.raw[key]
-            except KeyError:
-                log.debug(
-                    'Failed to get key {} from interface {}'.format(key,
-                                                                    self.name))
 
+        log.debug('Failed to get keys %s from interface %s', keys, self.name)
         return None
 
     @property
     def vendor(self):
         ''' Some disks don't have ID_VENDOR_* instead the vendor
             is encoded in the model: SanDisk_A223JJ3J3 '''
-        v = self._get_hwvalues(['ID_VENDOR_FROM_DATABASE', 'ID_VENDOR',
-                                'ID_VENDOR_ID'])
-        if v is None:
-            v = self.model
-            if v is not None:
-                return v.split('_')[0]
-        return v
+        if self._vendor is _UNSET:
+            v = self._get_hwvalues(['ID_VENDOR_FROM_DATABASE', 'ID_VENDOR',
+                                    'ID_VENDOR_ID'])
+            if v is None:
+                v = self.model
+                if v is not None:
+                    v = v.split('_')[0]
+            self._vendor = v
+        return self._vendor
 
     @property
     def model(self):
-        return self._get_hwvalues(['ID_MODEL_FROM_DATABASE', 'ID_MODEL',
-                                   'ID_MODEL_ID'])
+        if self._model is _UNSET:
+            self._model = self._get_hwvalues(['ID_MODEL_FROM_DATABASE',
+                                              'ID_MODEL', 'ID_MODEL_ID'])
+        return self._model
 
     @property
     def serial(self):
-        return self._get_hwvalues(['ID_SERIAL', 'ID_SERIAL_SHORT'])
+        if self._serial is _UNSET:
+            self._serial = self._get_hwvalues(['ID_SERIAL',
+                                               'ID_SERIAL_SHORT'])
+        return self._serial
 
     @property
     def devpath(self):
-        return self._get_hwvalues(['DEVPATH'])
+        if self._devpath is _UNSET:
+            self._devpath = self._get_hwvalues(['DEVPATH'])
+        return self._devpath
 
     @property
     def is_virtual(self):
-        return self.devpath.startswith('/devices/virtual/')
+        if self._is_virtual is _UNSET:
+            self._is_virtual = self.devpath.startswith('/devices/virtual/')
+        return self._is_virtual
 
 
 def interesting_storage_devs(context):
@@ -129,16 +164,22 @@ async def blockdev_probe(context=None, **kw):
         return ptable
 
     if not context:
-        context = pyudev.Context()
+        context = _get_context()
 
     blockdev = {}
     for device in interesting_storage_devs(context):
-        devname = device.properties['DEVNAME']
+        # pyudev builds a new Properties object on every access
+        props = device.properties
+        devname = props['DEVNAME']
         attrs = udev_get_attributes(device)
         # update the size attr as it may only be the number
-        # of blocks rather than size in bytes.
-        attrs['size'] = \
-            str(read_sys_block_size_bytes(devname))
+        # of blocks rather than size in bytes.  udev has already read
+        # the sysfs size file, so only go back to sysfs if it is missing.
+        size = attrs.get('size')
+        if size:
+            attrs['size'] = str(int(size) * SECTOR_SIZE_BYTES)
+        else:
+            attrs['size'] = str(read_sys_block_size_bytes(devname))
         # When dereferencing device[prop], pyudev calls bytes.decode(), which
         # can fail if the value is invalid utf-8. We don't want a single
         # invalid value to completely prevent probing. So we iterate
@@ -146,18 +187,22 @@ async def blockdev_probe(context=None, **kw):
         # that PARTNAME is subject to failures when accents and other special
         # characters are used in a GPT partition name.
         # See LP: 2017862
-        blockdev[devname] = {}
-        for prop in device.properties:
+        data = {}
+        for prop in props:
             try:
-                blockdev[devname][prop] = device.properties[prop]
+                value = props[prop]
+                if prop in _INTERNED_PROPS:
+                    value = sys.intern(value)
+                data[sys.intern(prop)] = value
             except UnicodeDecodeError:
                 log.warning('ignoring property %s of device %s because it is'
                             ' not valid utf-8', prop, devname)
-        blockdev[devname].update({'attrs': attrs})
+        data['attrs'] = attrs
         # include partition table info if present
         ptable = _extract_partition_table(devname)
         if ptable:
-            blockdev[devname].update(ptable)
+            data.update(ptable)
+        blockdev[devname] = data
 
     return blockdev
 
@@ -204,17 +249,25 @@ class Storage():
         'zfs': Probe(zfs.probe),
     }
 
-    def __init__(self, results={}):
-        self.results = results
-        self.context = pyudev.Context()
-
-    def _get_probe_types(self, get_all=False):
-        return {ptype for ptype, probe in self.probe_map.items()
-                if get_all or probe.in_default_set}
+    # lvm is the only probe that activates anything: vgchange creates the
+    # dm devices for logical volumes, and dmcrypt (like the read-only
+    # probes) must read udev after that. These run one at a time, in this
+    # order, before the remaining probes.
+    activation_order = ('lvm', 'dmcrypt')
+
+    def __init__(self, results=None, context=None):
+        self.results = results if results is not None else {}
+        if context is None:
+            context = _get_context()
+        self.context = context
+        self._default_probes = frozenset(
+            ptype for ptype, probe in self.probe_map.items()
+            if probe.in_default_set)
+        self._all_probes = frozenset(self.probe_map)
 
     async def probe(self, probe_types=None, *, parallelize=False):
-        default_probes = self._get_probe_types(False)
-        all_probes = self._get_probe_types(True)
+        default_probes = self._default_probes
+        all_probes = self._all_probes
         if not probe_types:
             to_probe = default_probes
         else:
@@ -226,7 +279,7 @@ class Storage():
         if len(to_probe) == 0:
             not_avail = probe_types.difference(all_probes)
             print('Requsted probes not available: %s' % probe_types)
-            print('Valid probe types: %s' % all_probes)
+            print('Valid probe types: %s' % sorted(all_probes))
             print('Unavilable probe types: %s' % not_avail)
             return self.results
 
@@ -240,7 +293,12 @@ class Storage():
             if result is not None:
                 probed_data[ptype] = result
 
-        coroutines = [run_probe(ptype) for ptype in to_probe]
+        for ptype in self.activation_order:
+            if ptype in to_probe:
+                await run_probe(ptype)
+
+        coroutines = [run_probe(ptype) for ptype in to_probe
+                      if ptype not in self.activation_order]
 
         if parallelize:
             await asyncio.gather(*coroutines)
@@ -1,5 +1,22 @@
+import functools
+import json
 import os
 
 TOP_DIR = os.path.join('/'.join(__file__.split('/')[:-3]))
 TEST_DATA = os.path.join(TOP_DIR, 'probert', 'tests', 'data')
 FAKE_PROBE_ALL_JSON = os.path.join(TEST_DATA, 'fake_probe_all.json')
+
+
+@functools.lru_cache(maxsize=None)
+def load_test_data(data_fname):
+    """ return the contents of a file in TEST_DATA, read once per process """
+    with open(os.path.join(TEST_DATA, data_fname), 'r') as fh:
+        return fh.read()
+
+
+@functools.lru_cache(maxsize=1)
+def load_fake_probe_all():
+    """ return the parsed FAKE_PROBE_ALL_JSON, parsed once per process.
+        The result is shared, so callers must not modify it. """
+    with open(FAKE_PROBE_ALL_JSON) as fh:
+        return json.load(fh)
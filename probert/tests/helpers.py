@@ -13,38 +13,28 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import contextlib
-import imp
-import importlib
 import random
 import string
-import unittest
-
-
-def builtin_module_name():
-    options = ('builtins', '__builtin__')
-    for name in options:
-        try:
-            imp.find_module(name)
-        except ImportError:
-            continue
-        else:
-            print('importing and returning: %s' % name)
-            importlib.import_module(name)
-            return name
+import subprocess
+from unittest import mock
 
 
 @contextlib.contextmanager
 def simple_mocked_open(content=None):
     if not content:
         content = ''
-    m_open = unittest.mock.mock_open(read_data=content)
-    mod_name = builtin_module_name()
-    m_patch = '{}.open'.format(mod_name)
-    with unittest.mock.patch(m_patch, m_open, create=True):
+    m_open = mock.mock_open(read_data=content)
+    with mock.patch('builtins.open', m_open):
         yield m_open
 
 
 def random_string(length=8):
     """ return a random lowercase string with default length of 8"""
-    return ''.join(
-        random.choice(string.ascii_lowercase) for _ in range(length))
+    return ''.join(random.choices(string.ascii_lowercase, k=length))
+
+
+def completed_process(stdout, args=('cmd',)):
+    """ return a successful CompletedProcess with stdout encoded as utf-8"""
+    return subprocess.CompletedProcess(args=list(args), returncode=0,
+                                       stdout=stdout.encode('utf-8'),
+                                       stderr=b'')
@@ -4,7 +4,7 @@ from unittest import mock
 
 from probert import dasd
 from probert.tests import fakes
-from probert.tests.helpers import random_string
+from probert.tests.helpers import completed_process, random_string
 
 
 # The tests parse canned dasdview output, and to be able to write
@@ -39,22 +39,24 @@ expected_probe_data = {
     }
 
 
-class TestDasd(unittest.IsolatedAsyncioTestCase):
+class FakeContext:
+    """ Stand-in for pyudev.Context handing out canned device lists. """
 
-    def _load_test_data(self, data_fname):
-        testfile = fakes.TEST_DATA + '/' + data_fname
-        with open(testfile, 'r') as fh:
-            return fh.read()
+    def __init__(self, *device_lists):
+        self._device_lists = iter(device_lists)
+
+    def list_devices(self, **kwargs):
+        return next(self._device_lists)
+
+
+class TestDasd(unittest.TestCase):
 
     @mock.patch('probert.dasd.os.path.exists')
     @mock.patch('probert.dasd.subprocess.run')
     def test_dasdview_returns_stdout(self, m_run, m_exists):
         devname = random_string()
         dasdview_out = random_string()
-        cp = subprocess.CompletedProcess(args=['foo'], returncode=0,
-                                         stdout=dasdview_out.encode('utf-8'),
-                                         stderr="")
-        m_run.return_value = cp
+        m_run.return_value = completed_process(dasdview_out)
         m_exists.return_value = True
         result = dasd.dasdview(devname)
         self.assertEqual(dasdview_out, result)
@@ -83,7 +85,7 @@ class TestDasd(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(
             4096,
             dasd.find_val_int(
-                dasd.DASD_BLKSIZE, self._load_test_data('dasdd.view')))
+                dasd.DASD_BLKSIZE, fakes.load_test_data('dasdd.view')))
 
     def test_dasd_blocksize_returns_none_on_invalid_output(self):
         self.assertIsNone(
@@ -92,9 +94,9 @@ class TestDasd(unittest.IsolatedAsyncioTestCase):
 
     def test_dasd_parses_disk_format(self):
         self.assertEqual('cdl',
-                         dasd.disk_format(self._load_test_data('dasdd.view')))
+                         dasd.disk_format(fakes.load_test_data('dasdd.view')))
         self.assertEqual('not-formatted',
-                         dasd.disk_format(self._load_test_data('dasde.view')))
+                         dasd.disk_format(fakes.load_test_data('dasde.view')))
 
     def test_dasd_parses_disk_format_ldl(self):
         output = "format : hex 1 dec 1 LDL formatted"
@@ -108,7 +110,7 @@ class TestDasd(unittest.IsolatedAsyncioTestCase):
         devname = random_string()
         id_path = random_string()
         device = {'DEVNAME': devname, 'ID_PATH': 'ccw-' + id_path}
-        m_dview.return_value = self._load_test_data('dasdd.view')
+        m_dview.return_value = fakes.load_test_data('dasdd.view')
         self.assertEqual(
             update_probe_data(
                 expected_probe_data['/dev/dasdd'],
@@ -123,28 +125,33 @@ class TestDasd(unittest.IsolatedAsyncioTestCase):
         m_dview.return_value = random_string()
         self.assertIsNone(dasd.get_dasd_info(device))
 
-    @mock.patch('probert.dasd.find_val_int')
     @mock.patch('probert.dasd.dasdview')
-    def test_get_dasd_info_returns_none_if_bad_blocksize(self, m_dview,
-                                                         m_find_val_int):
+    def test_get_dasd_info_returns_none_if_bad_blocksize(self, m_dview):
         devname = random_string()
         id_path = random_string()
         device = {'DEVNAME': devname, 'ID_PATH': 'ccw-' + id_path}
-        m_dview.return_value = self._load_test_data('dasdd.view')
-        m_find_val_int.return_value = None
+        m_dview.return_value = fakes.load_test_data('dasdd.view').replace(
+            'blocksize', random_string())
         self.assertIsNone(dasd.get_dasd_info(device))
 
-    @mock.patch('probert.dasd.disk_format')
     @mock.patch('probert.dasd.dasdview')
-    def test_get_dasd_info_returns_none_if_bad_disk_format(self, m_dview,
-                                                           m_disk):
+    def test_get_dasd_info_returns_none_if_bad_disk_format(self, m_dview):
         devname = random_string()
         id_path = random_string()
         device = {'DEVNAME': devname, 'ID_PATH': 'ccw-' + id_path}
-        m_dview.return_value = self._load_test_data('dasdd.view')
-        m_disk.return_value = None
+        m_dview.return_value = fakes.load_test_data('dasdd.view').replace(
+            'CDL formatted', 'XYZ formatted')
         self.assertIsNone(dasd.get_dasd_info(device))
 
+    @mock.patch('probert.dasd.dasdview')
+    def test_get_dasd_info_returns_none_if_dasdview_fails(self, m_dview):
+        device = {'DEVNAME': random_string(), 'ID_PATH': 'ccw-0.0.1544'}
+        m_dview.return_value = None
+        self.assertIsNone(dasd.get_dasd_info(device))
+
+
+class TestDasdProbe(unittest.IsolatedAsyncioTestCase):
+
     @mock.patch('probert.dasd.platform.machine')
     async def test_dasd_probe_returns_empty_dict_non_s390x_arch(
             self, m_machine):
@@ -157,13 +164,12 @@ class TestDasd(unittest.IsolatedAsyncioTestCase):
     @mock.patch('probert.dasd.dasdview')
     async def test_dasd_probe_dasdd(self, m_dasdview, m_machine):
         m_machine.return_value = 's390x'
-        m_dasdview.side_effect = iter([self._load_test_data('dasdd.view')])
+        m_dasdview.side_effect = iter([fakes.load_test_data('dasdd.view')])
 
-        context = mock.MagicMock()
-        context.list_devices.side_effect = iter([
+        context = FakeContext(
             [{"MAJOR": "94", "DEVNAME": "/dev/dasdd", "ID_SERIAL": "0X1544",
              "ID_PATH": "ccw-0.0.1544"}],
-        ])
+        )
         expected_results = {
             '/dev/dasdd': update_probe_data(
                 expected_probe_data['/dev/dasdd'], device_id="0.0.1544")
@@ -174,13 +180,12 @@ class TestDasd(unittest.IsolatedAsyncioTestCase):
     @mock.patch('probert.dasd.dasdview')
     async def test_dasd_probe_dasde(self, m_dasdview, m_machine):
         m_machine.return_value = 's390x'
-        m_dasdview.side_effect = iter([self._load_test_data('dasde.view')])
+        m_dasdview.side_effect = iter([fakes.load_test_data('dasde.view')])
 
-        context = mock.MagicMock()
-        context.list_devices.side_effect = iter([
+        context = FakeContext(
             [{"MAJOR": "94", "DEVNAME": "/dev/dasde",
              "ID_PATH": "ccw-0.0.2250"}],
-        ])
+        )
         expected_results = {
             '/dev/dasde': update_probe_data(
                 expected_probe_data['/dev/dasde'], device_id="0.0.2250")
@@ -192,18 +197,42 @@ class TestDasd(unittest.IsolatedAsyncioTestCase):
     async def test_dasd_probe_dasdd_skips_partitions(self, m_dasdview,
                                                      m_machine):
         m_machine.return_value = 's390x'
-        m_dasdview.side_effect = iter([self._load_test_data('dasdd.view')])
+        m_dasdview.side_effect = iter([fakes.load_test_data('dasdd.view')])
 
-        context = mock.MagicMock()
-        context.list_devices.side_effect = iter([
-            [{"MAJOR": "94", "DEVNAME": "/dev/dasdd", "ID_SERIAL": "0X1544",
-             "ID_PATH": "ccw-0.0.1544"}],
-            [{"MAJOR": "94", "DEVNAME": "/dev/dasdd1", "ID_SERIAL": "0X1544",
-             "ID_PATH": "ccw-0.0.1544", "PARTN": "1"}],
+        context = FakeContext([
+            {"MAJOR": "94", "DEVNAME": "/dev/dasdd", "ID_SERIAL": "0X1544",
+             "ID_PATH": "ccw-0.0.1544"},
+            {"MAJOR": "94", "DEVNAME": "/dev/dasdd1", "ID_SERIAL": "0X1544",
+             "ID_PATH": "ccw-0.0.1544", "PARTN": "1"},
+        ])
+        expected_results = {
+            '/dev/dasdd': update_probe_data(
+                expected_probe_data['/dev/dasdd'], device_id="0.0.1544"),
+            }
+        self.assertEqual(expected_results, await dasd.probe(context=context))
+
+    @mock.patch('probert.dasd.platform.machine')
+    @mock.patch('probert.dasd.dasdview')
+    async def test_dasd_probe_multiple_dasds(self, m_dasdview, m_machine):
+        m_machine.return_value = 's390x'
+        views = {
+            '/dev/dasdd': fakes.load_test_data('dasdd.view'),
+            '/dev/dasde': fakes.load_test_data('dasde.view'),
+        }
+        # devices are probed concurrently, so answer by name, not order
+        m_dasdview.side_effect = views.get
+
+        context = FakeContext([
+            {"MAJOR": "94", "DEVNAME": "/dev/dasdd",
+             "ID_PATH": "ccw-0.0.1544"},
+            {"MAJOR": "94", "DEVNAME": "/dev/dasde",
+             "ID_PATH": "ccw-0.0.2250"},
         ])
         expected_results = {
             '/dev/dasdd': update_probe_data(
                 expected_probe_data['/dev/dasdd'], device_id="0.0.1544"),
+            '/dev/dasde': update_probe_data(
+                expected_probe_data['/dev/dasde'], device_id="0.0.2250"),
             }
         self.assertEqual(expected_results, await dasd.probe(context=context))
 
@@ -219,10 +248,9 @@ class TestDasd(unittest.IsolatedAsyncioTestCase):
         m_open.return_value = ['{} virtblk\n'.format(virtio_major)]
         m_run.return_value.returncode = 0
 
-        context = mock.MagicMock()
-        context.list_devices.side_effect = iter([
+        context = FakeContext(
             [{"MAJOR": virtio_major, "DEVNAME": devname}],
-        ])
+        )
         expected_results = {
             devname: {'name': devname, 'type': 'virt'}
             }
@@ -243,10 +271,9 @@ class TestDasd(unittest.IsolatedAsyncioTestCase):
         m_open.return_value = ['{} virtblk\n'.format(virtio_major)]
         m_run.return_value.returncode = 1
 
-        context = mock.MagicMock()
-        context.list_devices.side_effect = iter([
+        context = FakeContext(
             [{"MAJOR": virtio_major, "DEVNAME": devname}],
-        ])
+        )
         self.assertEqual({}, await dasd.probe(context=context))
         m_run.assert_called_once_with(
             ['fdasd', '-i', devname],
@@ -12,9 +12,6 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-import random
-import string
-
 from unittest import IsolatedAsyncioTestCase
 from unittest.mock import AsyncMock, Mock, patch
 
@@ -25,17 +22,10 @@ from probert.filesystem import (
     get_ntfs_sizing,
     get_swap_sizing,
     get_device_filesystem,
+    probe,
 )
-
-
-def read_file(filename):
-    with open(filename, 'r') as fp:
-        return fp.read()
-
-
-def random_string(length=8):
-    return ''.join(
-        random.choice(string.ascii_lowercase) for _ in range(length))
+from probert.tests.fakes import load_test_data
+from probert.tests.helpers import random_string
 
 
 class TestGetSwapSizing(IsolatedAsyncioTestCase):
@@ -75,7 +65,7 @@ Block size:  4000
 
     @patch('probert.filesystem.arun')
     async def test_dumpe2fs_real_output(self, run):
-        run.return_value = read_file('probert/tests/data/dumpe2fs_ext4.out')
+        run.return_value = load_test_data('dumpe2fs_ext4.out')
         expected = {'block_count': 10240, 'block_size': 4096}
         self.assertEqual(expected, await get_dumpe2fs_info(self.device))
 
@@ -85,38 +75,42 @@ Block size:  4000
         expected = {'min_blocks': 1371}
         self.assertEqual(expected, await get_resize2fs_info(self.device))
 
-    @patch('probert.filesystem.get_resize2fs_info')
-    @patch('probert.filesystem.get_dumpe2fs_info')
-    async def test_ext4(self, dumpe2fs, resize2fs):
-        dumpe2fs.return_value = {'block_count': 20000, 'block_size': 1000}
-        resize2fs.return_value = {'min_blocks': 4000}
-        expected = {'SIZE': 20000 * 1000, 'ESTIMATED_MIN_SIZE': 4000 * 1000}
-        self.assertEqual(expected, await get_ext_sizing(self.device))
+    async def test_ext4(self):
+        with patch.multiple(
+                'probert.filesystem',
+                get_dumpe2fs_info=AsyncMock(
+                    return_value={'block_count': 20000, 'block_size': 1000}),
+                get_resize2fs_info=AsyncMock(
+                    return_value={'min_blocks': 4000})):
+            expected = {'SIZE': 20000 * 1000,
+                        'ESTIMATED_MIN_SIZE': 4000 * 1000}
+            self.assertEqual(expected, await get_ext_sizing(self.device))
 
     @patch('probert.filesystem.get_dumpe2fs_info')
     async def test_ext4_bad_dumpe2fs(self, dumpe2fs):
         dumpe2fs.return_value = None
         self.assertIsNone(await get_ext_sizing(self.device))
 
-    @patch('probert.filesystem.get_resize2fs_info')
-    @patch('probert.filesystem.get_dumpe2fs_info')
-    async def test_ext4_bad_resize2fs(self, dumpe2fs, resize2fs):
-        dumpe2fs.return_value = {'block_count': 20000, 'block_size': 1000}
-        resize2fs.return_value = None
-        expected = {'SIZE': 20000 * 1000}
-        self.assertEqual(expected, await get_ext_sizing(self.device))
+    async def test_ext4_bad_resize2fs(self):
+        with patch.multiple(
+                'probert.filesystem',
+                get_dumpe2fs_info=AsyncMock(
+                    return_value={'block_count': 20000, 'block_size': 1000}),
+                get_resize2fs_info=AsyncMock(return_value=None)):
+            expected = {'SIZE': 20000 * 1000}
+            self.assertEqual(expected, await get_ext_sizing(self.device))
 
     @patch('probert.filesystem.arun')
     @patch('probert.filesystem.shutil.which', Mock())
     async def test_ntfs_real_output(self, run):
-        run.return_value = read_file('probert/tests/data/ntfsresize.out')
+        run.return_value = load_test_data('ntfsresize.out')
         expected = {'SIZE': 41939456, 'ESTIMATED_MIN_SIZE': 2613248}
         self.assertEqual(expected, await get_ntfs_sizing(self.device))
 
     @patch('probert.filesystem.arun')
     @patch('probert.filesystem.shutil.which', Mock())
     async def test_ntfs_real_output_full(self, run):
-        run.return_value = read_file('probert/tests/data/ntfsresize_full.out')
+        run.return_value = load_test_data('ntfsresize_full.out')
         expected = {'SIZE': 83882496, 'ESTIMATED_MIN_SIZE': 83882496}
         self.assertEqual(expected, await get_ntfs_sizing(self.device))
 
@@ -142,36 +136,28 @@ You might resize at 25000000 bytes or 25 MB (freeing 75 MB).
 
     async def test_get_device_filesystem_no_sizing(self):
         data = {'ID_FS_FOO': 'bar'}
-        self.device.properties = Mock()
-        self.device.properties.__iter__ = Mock(return_value=iter(data))
-        self.device.properties.__getitem__ = lambda _, x: data[x]
+        self.device.properties = data
         expected = {'FOO': 'bar'}
         self.assertEqual(expected,
                          await get_device_filesystem(self.device, False))
 
     async def test_get_device_filesystem_sizing_unsupported(self):
         data = {'ID_FS_TYPE': 'reiserfs'}
-        self.device.properties = Mock()
-        self.device.properties.__iter__ = Mock(return_value=iter(data))
-        self.device.properties.__getitem__ = lambda _, x: data[x]
+        self.device.properties = data
         expected = {'ESTIMATED_MIN_SIZE': -1, 'TYPE': 'reiserfs'}
         self.assertEqual(expected,
                          await get_device_filesystem(self.device, True))
 
     async def test_get_device_filesystem_missing_info(self):
         data = {}
-        self.device.properties = Mock()
-        self.device.properties.__iter__ = Mock(return_value=iter(data))
-        self.device.properties.__getitem__ = lambda _, x: data[x]
+        self.device.properties = data
         expected = {'ESTIMATED_MIN_SIZE': -1}
         self.assertEqual(expected,
                          await get_device_filesystem(self.device, True))
 
     async def test_get_device_filesystem_sizing_ext4(self):
         data = {'ID_FS_TYPE': 'ext4'}
-        self.device.properties = Mock()
-        self.device.properties.__iter__ = Mock(return_value=iter(data))
-        self.device.properties.__getitem__ = lambda _, x: data[x]
+        self.device.properties = data
         size_info = {'ESTIMATED_MIN_SIZE': 1 << 20, 'SIZE': 10 << 20}
         ext4 = AsyncMock()
         ext4.return_value = size_info
@@ -184,9 +170,7 @@ You might resize at 25000000 bytes or 25 MB (freeing 75 MB).
 
     async def test_get_device_filesystem_sizing_ext4_no_min(self):
         data = {'ID_FS_TYPE': 'ext4'}
-        self.device.properties = Mock()
-        self.device.properties.__iter__ = Mock(return_value=iter(data))
-        self.device.properties.__getitem__ = lambda _, x: data[x]
+        self.device.properties = data
         size_info = {'SIZE': 10 << 20}
         ext4 = AsyncMock()
         ext4.return_value = size_info
@@ -212,3 +196,20 @@ You might resize at 25000000 bytes or 25 MB (freeing 75 MB).
     async def test_resize2fs_not_found(self, which):
         which.return_value = None
         self.assertEqual(None, await get_resize2fs_info(self.device))
+
+
+class TestFilesystemProbe(IsolatedAsyncioTestCase):
+    @patch('probert.filesystem.get_device_filesystem')
+    @patch('probert.filesystem.sane_block_devices')
+    async def test_probe_skips_ram_and_loop(self, sane_block_devices,
+                                            get_device_filesystem):
+        sane_block_devices.return_value = [
+            {'MAJOR': '1', 'DEVNAME': '/dev/ram0'},
+            {'MAJOR': '7', 'DEVNAME': '/dev/loop0'},
+            {'MAJOR': '8', 'DEVNAME': '/dev/sda1'},
+        ]
+        get_device_filesystem.return_value = {'USAGE': 'filesystem'}
+        result = await probe(context=Mock(), enabled_probes=set())
+        self.assertEqual({'/dev/sda1': {'USAGE': 'filesystem'}}, result)
+        get_device_filesystem.assert_called_once_with(
+            {'MAJOR': '8', 'DEVNAME': '/dev/sda1'}, False)
@@ -5,37 +5,48 @@ import unittest
 from unittest import mock
 
 from probert import lvm
-from probert.tests.helpers import random_string
-
-CONTEXT = [
-  {
-    "DEVNAME": "/dev/dm-0",
-    "DEVTYPE": "disk",
-    "DM_LV_NAME": "lv1",
-    "DM_NAME": "vg1-lv1",
-    "DM_UUID": "LVM-IBOfU1ELB4dehjpX2wy3BtkD504ARo0oclQZnCRnv2TGeopW5eZiP",
-    "DM_VG_NAME": "vg1",
-    "attrs": {
-      "size": "1073741824",
-    }
-  }, {
-    "DEVNAME": "/dev/vda5",
-    "DEVTYPE": "partition",
-    "ID_FS_TYPE": "LVM2_member",
-    "USEC_INITIALIZED": "130182115",
-    "attrs": {
-      "size": "2147483648",
-    }
-  }, {
-    "DEVNAME": "/dev/vda6",
-    "DEVTYPE": "partition",
-    "ID_FS_TYPE": "LVM2_member",
-    "attrs": {
-      "size": "3221225472",
-    }
-  },
+from probert.tests.helpers import completed_process, random_string
+
+
+def _mk_ctx(rows):
+    """ build fresh udev device dicts from (devname, devtype, props) rows"""
+    return [dict(props, DEVNAME=devname, DEVTYPE=devtype,
+                 attrs=dict(props['attrs']))
+            for devname, devtype, props in rows]
+
+
+LV1_ROWS = [
+    ("/dev/dm-0", "disk", {
+        "DM_LV_NAME": "lv1",
+        "DM_NAME": "vg1-lv1",
+        "DM_UUID":
+            "LVM-IBOfU1ELB4dehjpX2wy3BtkD504ARo0oclQZnCRnv2TGeopW5eZiP",
+        "DM_VG_NAME": "vg1",
+        "attrs": {"size": "1073741824"},
+    }),
+    ("/dev/vda5", "partition", {
+        "ID_FS_TYPE": "LVM2_member",
+        "USEC_INITIALIZED": "130182115",
+        "attrs": {"size": "2147483648"},
+    }),
+    ("/dev/vda6", "partition", {
+        "ID_FS_TYPE": "LVM2_member",
+        "attrs": {"size": "3221225472"},
+    }),
+]
+LV2_ROWS = [
+    ("/dev/dm-1", "disk", {
+        "DM_LV_NAME": "lv2",
+        "DM_NAME": "vg1-lv2",
+        "DM_UUID":
+            "LVM-IBOfU1ELB4dehjpX2wy3BtkD504ARo0oclQZnCRnv2TGeopW5eZiP",
+        "DM_VG_NAME": "vg1",
+        "attrs": {"size": "1073741824"},
+    }),
 ]
 
+CONTEXT = _mk_ctx(LV1_ROWS)
+
 VGS_REPORT = [
     {
         "vg_name": "vg1",
@@ -50,24 +61,12 @@ VGS_REPORT = [
     },
 ]
 
-CONTEXT_DUPES = 2 * CONTEXT + [
-  {
-    "DEVNAME": "/dev/dm-1",
-    "DEVTYPE": "disk",
-    "DM_LV_NAME": "lv2",
-    "DM_NAME": "vg1-lv2",
-    "DM_UUID": "LVM-IBOfU1ELB4dehjpX2wy3BtkD504ARo0oclQZnCRnv2TGeopW5eZiP",
-    "DM_VG_NAME": "vg1",
-    "attrs": {
-      "size": "1073741824",
-    }
-  },
-]
+CONTEXT_DUPES = _mk_ctx(2 * LV1_ROWS + LV2_ROWS)
 VGS_REPORT_DUPES = 2 * VGS_REPORT
 
 
 @mock.patch('probert.lvm.subprocess.run')
-class TestLvm(unittest.IsolatedAsyncioTestCase):
+class TestLvm(unittest.TestCase):
 
     def test__lvm_report_returns_empty_list_on_err(self, m_run):
         m_run.side_effect = subprocess.CalledProcessError(
@@ -77,28 +76,19 @@ class TestLvm(unittest.IsolatedAsyncioTestCase):
 
     def test__lvm_report_returns_empty_list_on_no_output(self, m_run):
         cmd_out = ""
-        cp = subprocess.CompletedProcess(args=[random_string()], returncode=0,
-                                         stdout=cmd_out.encode('utf-8'),
-                                         stderr="")
-        m_run.return_value = cp
+        m_run.return_value = completed_process(cmd_out)
         self.assertEqual([], lvm._lvm_report(random_string(), random_string()))
 
     def test__lvm_report_returns_empty_list_on_invalid_json(self, m_run):
         cmd_out = "This is not json"
-        cp = subprocess.CompletedProcess(args=[random_string()], returncode=0,
-                                         stdout=cmd_out.encode('utf-8'),
-                                         stderr="")
-        m_run.return_value = cp
+        m_run.return_value = completed_process(cmd_out)
         self.assertEqual([], lvm._lvm_report(random_string(), random_string()))
 
     def test__lvm_report_returns_found_reports(self, m_run):
         report_key = random_string()
         report_data = [{random_string(): random_string()}]
         cmd_out = json.dumps({"report": [{report_key: report_data}]})
-        cp = subprocess.CompletedProcess(args=[random_string()], returncode=0,
-                                         stdout=cmd_out.encode('utf-8'),
-                                         stderr="")
-        m_run.return_value = cp
+        m_run.return_value = completed_process(cmd_out)
         expected_result = report_data
         result = lvm._lvm_report(random_string(), report_key)
         self.assertEqual(expected_result, result)
@@ -115,10 +105,7 @@ class TestLvm(unittest.IsolatedAsyncioTestCase):
                 {random_string(): extra_data2},
              ]
         })
-        cp = subprocess.CompletedProcess(args=[random_string()], returncode=0,
-                                         stdout=cmd_out.encode('utf-8'),
-                                         stderr="")
-        m_run.return_value = cp
+        m_run.return_value = completed_process(cmd_out)
         expected_result = report_data
         result = lvm._lvm_report(random_string(), report_key)
         self.assertEqual(expected_result, result)
@@ -261,6 +248,10 @@ class TestLvm(unittest.IsolatedAsyncioTestCase):
             lvm.extract_lvm_partition(input_data))
         m_size.assert_called_with('/dev/dm-2')
 
+
+@mock.patch('probert.lvm.subprocess.run')
+class TestLvmProbe(unittest.IsolatedAsyncioTestCase):
+
     @mock.patch('probert.lvm.read_sys_block_size_bytes')
     @mock.patch('probert.lvm.activate_volgroups')
     @mock.patch('probert.lvm.lvm_scan')
@@ -294,6 +285,7 @@ class TestLvm(unittest.IsolatedAsyncioTestCase):
             }
         }
         self.assertEqual(expected_result, await lvm.probe())
+        m_blockdevs.assert_called_once_with(mock.ANY, DM_UUID='LVM*')
 
     @mock.patch('probert.lvm.read_sys_block_size_bytes')
     @mock.patch('probert.lvm.activate_volgroups')
@@ -335,5 +327,21 @@ class TestLvm(unittest.IsolatedAsyncioTestCase):
         }
         self.assertEqual(expected_result, await lvm.probe())
 
+    @mock.patch('probert.lvm.read_sys_block_size_bytes')
+    @mock.patch('probert.lvm.activate_volgroups')
+    @mock.patch('probert.lvm.lvm_scan')
+    @mock.patch('probert.lvm.sane_block_devices')
+    @mock.patch('probert.lvm.probe_vgs_report')
+    async def test_probe_extracts_each_volgroup_once(self, m_vgs, m_blockdevs,
+                                                     m_scan, m_activate,
+                                                     m_size, m_run):
+        m_size.return_value = 1000
+        m_blockdevs.return_value = CONTEXT_DUPES
+        m_vgs.return_value = VGS_REPORT_DUPES
+        with mock.patch('probert.lvm.extract_lvm_volgroup',
+                        wraps=lvm.extract_lvm_volgroup) as m_extract:
+            await lvm.probe()
+        m_extract.assert_called_once()
+
 
 # vi: ts=4 expandtab syntax=python
@@ -3,20 +3,23 @@ import unittest
 from unittest import mock
 
 from probert import multipath
-from probert.tests.helpers import random_string
+from probert.tests.helpers import completed_process
 
 MP_SEP = multipath.MP_SEP
 
+# field contents are irrelevant to the parser, so build them once
+PATH_OUT = MP_SEP.join('path%d' % i for i in range(8))
+PATH_OUT_2 = MP_SEP.join('other%d' % i for i in range(8))
+MAP_OUT = MP_SEP.join('map%d' % i for i in range(3))
+MAP_OUT_2 = MP_SEP.join('other%d' % i for i in range(3))
 
-class TestMultipath(unittest.IsolatedAsyncioTestCase):
+
+class TestMultipath(unittest.TestCase):
 
     @mock.patch('probert.multipath.subprocess.run')
     def test_multipath_show_paths(self, m_run):
-        mp_out = MP_SEP.join([random_string() for x in range(0, 8)])
-        cp = subprocess.CompletedProcess(args=['foo'], returncode=0,
-                                         stdout=mp_out.encode('utf-8'),
-                                         stderr="")
-        m_run.return_value = cp
+        mp_out = PATH_OUT
+        m_run.return_value = completed_process(mp_out)
         expected_result = [multipath.MPath(*mp_out.split(MP_SEP))._asdict()]
         result = multipath.multipath_show_paths()
         self.assertEqual(expected_result, result)
@@ -24,55 +27,44 @@ class TestMultipath(unittest.IsolatedAsyncioTestCase):
     @mock.patch('probert.multipath.subprocess.run')
     def test_multipath_show_paths_serial_with_spaces(self, m_run):
         mp_out = MP_SEP.join(['sda', 'IPR-0 1234567890'] +
-                             [random_string() for x in range(0, 6)])
-        cp = subprocess.CompletedProcess(args=['foo'], returncode=0,
-                                         stdout=mp_out.encode('utf-8'),
-                                         stderr="")
-        m_run.return_value = cp
+                             PATH_OUT.split(MP_SEP)[2:])
+        m_run.return_value = completed_process(mp_out)
         expected_result = [multipath.MPath(*mp_out.split(MP_SEP))._asdict()]
         result = multipath.multipath_show_paths()
         self.assertEqual(expected_result, result)
 
     @mock.patch('probert.multipath.subprocess.run')
     def test_multipath_show_paths_skips_unparsable_output(self, m_run):
-        lines = [
-            MP_SEP.join([random_string() for x in range(0, 8)]),
-            "",
-            MP_SEP.join([random_string() for x in range(0, 8)]),
-        ]
+        lines = [PATH_OUT, "", PATH_OUT_2]
         mp_out = "\n".join(lines)
-        cp = subprocess.CompletedProcess(args=['foo'], returncode=0,
-                                         stdout=mp_out.encode('utf-8'),
-                                         stderr="")
-        m_run.return_value = cp
+        m_run.return_value = completed_process(mp_out)
         expected_result = [multipath.MPath(*lines[0].split(MP_SEP))._asdict(),
                            multipath.MPath(*lines[2].split(MP_SEP))._asdict()]
         result = multipath.multipath_show_paths()
         self.assertEqual(expected_result, result)
 
+    @mock.patch('probert.multipath.subprocess.run')
+    def test_multipath_show_paths_skips_wrong_field_count(self, m_run):
+        lines = [PATH_OUT + MP_SEP + 'extra', PATH_OUT_2,
+                 MP_SEP.join(PATH_OUT.split(MP_SEP)[:7])]
+        m_run.return_value = completed_process("\n".join(lines))
+        expected_result = [multipath.MPath(*lines[1].split(MP_SEP))._asdict()]
+        result = multipath.multipath_show_paths()
+        self.assertEqual(expected_result, result)
+
     @mock.patch('probert.multipath.subprocess.run')
     def test_multipath_show_maps(self, m_run):
-        mp_out = MP_SEP.join([random_string() for x in range(0, 3)])
-        cp = subprocess.CompletedProcess(args=['foo'], returncode=0,
-                                         stdout=mp_out.encode('utf-8'),
-                                         stderr="")
-        m_run.return_value = cp
+        mp_out = MAP_OUT
+        m_run.return_value = completed_process(mp_out)
         expected_result = [multipath.MMap(*mp_out.split(MP_SEP))._asdict()]
         result = multipath.multipath_show_maps()
         self.assertEqual(expected_result, result)
 
     @mock.patch('probert.multipath.subprocess.run')
     def test_multipath_show_maps_skips_unparsable_output(self, m_run):
-        lines = [
-            MP_SEP.join([random_string() for x in range(0, 3)]),
-            "",
-            MP_SEP.join([random_string() for x in range(0, 3)]),
-        ]
+        lines = [MAP_OUT, "", MAP_OUT_2]
         mp_out = "\n".join(lines)
-        cp = subprocess.CompletedProcess(args=['foo'], returncode=0,
-                                         stdout=mp_out.encode('utf-8'),
-                                         stderr="")
-        m_run.return_value = cp
+        m_run.return_value = completed_process(mp_out)
         expected_result = [multipath.MMap(*lines[0].split(MP_SEP))._asdict(),
                            multipath.MMap(*lines[2].split(MP_SEP))._asdict()]
         result = multipath.multipath_show_maps()
@@ -85,14 +77,15 @@ class TestMultipath(unittest.IsolatedAsyncioTestCase):
         result = multipath.multipath_show_paths()
         self.assertEqual([], result)
 
+
+class TestMultipathProbe(unittest.IsolatedAsyncioTestCase):
+
     @mock.patch('probert.multipath.multipath_show_paths')
     @mock.patch('probert.multipath.multipath_show_maps')
     async def test_multipath_probe_collects_maps_and_paths(self, m_maps,
                                                            m_paths):
-        path_string = MP_SEP.join([random_string() for x in range(0, 8)])
-        paths = multipath.MPath(*path_string.split(MP_SEP))._asdict()
-        maps_string = MP_SEP.join([random_string() for x in range(0, 3)])
-        maps = multipath.MMap(*maps_string.split(MP_SEP))._asdict()
+        paths = multipath.MPath(*PATH_OUT.split(MP_SEP))._asdict()
+        maps = multipath.MMap(*MAP_OUT.split(MP_SEP))._asdict()
         m_maps.return_value = [maps]
         m_paths.return_value = [paths]
         result = await multipath.probe()
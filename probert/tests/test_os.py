@@ -13,16 +13,13 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import subprocess
-from unittest import IsolatedAsyncioTestCase
-from unittest.mock import patch, Mock
+from unittest import IsolatedAsyncioTestCase, TestCase
+from unittest.mock import patch
 
 from probert.os import probe, _parse_osprober, _run_os_prober
 
 
-class TestOsProber(IsolatedAsyncioTestCase):
-    def tearDown(self):
-        _run_os_prober.cache_clear()
-
+class TestOsProber(TestCase):
     def test_empty(self):
         self.assertEqual({}, _parse_osprober([]))
 
@@ -120,10 +117,22 @@ class TestOsProber(IsolatedAsyncioTestCase):
         }
         self.assertEqual(expected, _parse_osprober(lines))
 
-    @patch('probert.os.subprocess.run')
-    @patch('probert.os.shutil.which', Mock())
-    async def test_osx_run(self, run):
-        run.return_value.stdout = '/dev/sda4:Mac OS X:MacOSX:macosx\n'
+
+class TestOsProberRun(IsolatedAsyncioTestCase):
+    def setUp(self):
+        # clear up front, and again afterwards, so that no cached
+        # os-prober result leaks between tests or into other modules
+        _run_os_prober.cache_clear()
+        self.addCleanup(_run_os_prober.cache_clear)
+        run_patcher = patch('probert.os.subprocess.run')
+        which_patcher = patch('probert.os.shutil.which')
+        self.run = run_patcher.start()
+        which_patcher.start()
+        self.addCleanup(run_patcher.stop)
+        self.addCleanup(which_patcher.stop)
+
+    async def test_osx_run(self):
+        self.run.return_value.stdout = '/dev/sda4:Mac OS X:MacOSX:macosx\n'
         expected = {
             '/dev/sda4': {
                 'long': 'Mac OS X',
@@ -133,28 +142,20 @@ class TestOsProber(IsolatedAsyncioTestCase):
         }
         self.assertEqual(expected, await probe())
 
-    @patch('probert.os.subprocess.run')
-    @patch('probert.os.shutil.which', Mock())
-    async def test_empty_run(self, run):
-        run.return_value.stdout = ''
+    async def test_empty_run(self):
+        self.run.return_value.stdout = ''
         self.assertEqual({}, await probe())
 
-    @patch('probert.os.subprocess.run')
-    @patch('probert.os.shutil.which', Mock())
-    async def test_none_run(self, run):
-        run.return_value.stdout = None
+    async def test_none_run(self):
+        self.run.return_value.stdout = None
         self.assertEqual({}, await probe())
 
-    @patch('probert.os.subprocess.run')
-    @patch('probert.os.shutil.which', Mock())
-    async def test_osprober_fail(self, run):
-        run.side_effect = subprocess.CalledProcessError(1, 'cmd')
+    async def test_osprober_fail(self):
+        self.run.side_effect = subprocess.CalledProcessError(1, 'cmd')
         self.assertEqual({}, await probe())
 
-    @patch('probert.os.subprocess.run')
-    @patch('probert.os.shutil.which', Mock())
-    async def test_run_once(self, run):
-        run.return_value.stdout = ''
+    async def test_run_once(self):
+        self.run.return_value.stdout = ''
         self.assertEqual({}, await probe())
         self.assertEqual({}, await probe())
-        run.assert_called_once()
+        self.run.assert_called_once()
@@ -1,9 +1,13 @@
 import unittest
-from unittest.mock import AsyncMock, Mock
-import json
+from unittest.mock import AsyncMock, Mock, patch
 
-from probert.storage import Storage, StorageInfo, interesting_storage_devs
-from probert.tests.fakes import FAKE_PROBE_ALL_JSON
+from probert.storage import (
+    Storage,
+    StorageInfo,
+    blockdev_probe,
+    interesting_storage_devs,
+    )
+from probert.tests.fakes import load_fake_probe_all
 
 from parameterized import parameterized
 
@@ -36,16 +40,45 @@ class ProbertTestInterestingDevs(unittest.TestCase):
         self.assertEqual(expected, actual)
 
 
+@patch('probert.storage.subprocess.run', Mock(return_value=Mock(stdout=b'')))
+@patch('probert.storage.udev_get_attributes')
+@patch('probert.storage.interesting_storage_devs')
+class ProbertTestBlockdevProbe(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.device = Mock()
+        self.device.properties = {'DEVNAME': '/dev/sda', 'MAJOR': '8'}
+
+    async def test_size_from_udev_attrs(self, m_devs, m_attrs):
+        m_devs.return_value = [self.device]
+        m_attrs.return_value = {'size': '2048'}
+        with patch('probert.storage.read_sys_block_size_bytes') as m_size:
+            result = await blockdev_probe(context=Mock())
+        m_size.assert_not_called()
+        self.assertEqual('1048576', result['/dev/sda']['attrs']['size'])
+
+    async def test_size_falls_back_to_sysfs(self, m_devs, m_attrs):
+        m_devs.return_value = [self.device]
+        m_attrs.return_value = {'size': None}
+        with patch('probert.storage.read_sys_block_size_bytes') as m_size:
+            m_size.return_value = 4096
+            result = await blockdev_probe(context=Mock())
+        m_size.assert_called_once_with('/dev/sda')
+        self.assertEqual('4096', result['/dev/sda']['attrs']['size'])
+
+
 class ProbertTestStorage(unittest.TestCase):
     def setUp(self):
         super(ProbertTestStorage, self).setUp()
 
     def test_storage_init(self):
-        with open(FAKE_PROBE_ALL_JSON) as f:
-            self.results = json.load(f)
-        storage = Storage(results=self.results)
+        storage = Storage(results=load_fake_probe_all())
         self.assertNotEqual(None, storage)
 
+    def test_storage_default_results_not_shared(self):
+        storage = Storage(context=Mock())
+        storage.results['/dev/sda'] = {}
+        self.assertEqual({}, Storage(context=Mock()).results)
+
 
 class ProbertTestStorageProbeSet(unittest.IsolatedAsyncioTestCase):
     def setUp(self):
@@ -80,6 +113,14 @@ class ProbertTestStorageProbeSet(unittest.IsolatedAsyncioTestCase):
             else:
                 v.pfunc.assert_not_called()
 
+    @parameterized.expand([(True,), (False,)])
+    async def test_storage_activation_order(self, parallelize):
+        calls = []
+        for k, v in self.storage.probe_map.items():
+            v.pfunc.side_effect = lambda k=k, **kw: calls.append(k)
+        await self.storage.probe(parallelize=parallelize)
+        self.assertEqual(['lvm', 'dmcrypt'], calls[:2])
+
     async def test_storage_unknown_type(self):
         probe_types = {'not-a-real-type'}
         await self.storage.probe(probe_types)
@@ -100,8 +141,7 @@ class ProbertTestStorageInfo(unittest.TestCase):
     '''
     def setUp(self):
         super(ProbertTestStorageInfo, self).setUp()
-        with open(FAKE_PROBE_ALL_JSON) as f:
-            self.results = json.load(f)
+        self.results = load_fake_probe_all()
 
     def test_storageinfo_init(self):
         probe_data = {
@@ -1,10 +1,11 @@
 import contextlib
 import logging
 import os
+import subprocess
 import tempfile
 import textwrap
 import unittest
-from unittest.mock import call
+from unittest.mock import Mock, call, patch
 
 from probert import utils
 from probert.tests.helpers import random_string, simple_mocked_open
@@ -22,6 +23,12 @@ class ProbertTestUtils(unittest.TestCase):
         self.assertEqual(sorted(combined['relations']),
                          sorted(test_result['relations']))
 
+    def test_utils_dict_merge_keeps_list_order(self):
+        r1 = {'relations': ['x1', 'm1', 'x2']}
+        r2 = {'relations': ['m2', 'x1', 'a1']}
+        self.assertEqual({'relations': ['x1', 'm1', 'x2', 'm2', 'a1']},
+                         utils.dict_merge(r1, r2))
+
     def test_utils_dict_merge_lists(self):
         r1 = ['m1', 'x1']
         r2 = ['m2', 'x2']
@@ -29,6 +36,12 @@ class ProbertTestUtils(unittest.TestCase):
         test_result = utils.dict_merge(r1, r2)
         self.assertEqual(sorted(combined), sorted(test_result))
 
+    def test_utils_dict_merge_lists_empty_source(self):
+        r1 = ['m1', 'x1']
+        test_result = utils.dict_merge(r1, [])
+        self.assertEqual(r1, test_result)
+        self.assertIsNot(r1, test_result)
+
     def test_utils_dict_merge_dicts(self):
         r1 = {'storage': {'/dev/sda': {'DEVTYPE': 'disk'}}}
         r2 = {'storage': {'/dev/sda': {'ID_MODEL': 'AWESOME'}}}
@@ -41,7 +54,27 @@ class ProbertTestUtils(unittest.TestCase):
             }
         }
         test_result = utils.dict_merge(r1, r2)
-        self.assertEqual(sorted(combined), sorted(test_result))
+        self.assertEqual(combined, test_result)
+
+    def test_utils_dict_merge_empty_source(self):
+        r1 = {'storage': {'/dev/sda': {'DEVTYPE': 'disk'}}}
+        test_result = utils.dict_merge(r1, {})
+        self.assertEqual(r1, test_result)
+        self.assertIsNot(r1, test_result)
+        test_result = utils.dict_merge(r1, {'storage': {'/dev/sda': {}}})
+        self.assertIs(r1['storage']['/dev/sda'],
+                      test_result['storage']['/dev/sda'])
+
+    def test_utils_dict_merge_leaves_inputs_alone(self):
+        untouched = {'DEVTYPE': 'disk'}
+        r1 = {'storage': {'/dev/sda': {'DEVTYPE': 'disk'}},
+              'other': untouched}
+        r2 = {'storage': {'/dev/sda': {'ID_MODEL': 'AWESOME'}}}
+        test_result = utils.dict_merge(r1, r2)
+        self.assertEqual({'/dev/sda': {'DEVTYPE': 'disk'}}, r1['storage'])
+        self.assertEqual({'/dev/sda': {'ID_MODEL': 'AWESOME'}},
+                         r2['storage'])
+        self.assertIs(untouched, test_result['other'])
 
     def test_utils_read_sys_block_size_bytes(self):
         devname = random_string()
@@ -63,6 +96,36 @@ class ProbertTestUtils(unittest.TestCase):
             self.assertEqual(expected_bytes, result)
             self.assertEqual([call(expected_fname)], m_open.call_args_list)
 
+    def test_utils_parse_dhclient_leases_file(self):
+        content = textwrap.dedent('''\
+            lease {
+              interface "eth0";
+              fixed-address 192.168.122.89;
+              option subnet-mask 255.255.255.0;
+              option routers 192.168.122.1;
+              renew 4 2019/05/02 18:30:02;
+            }
+            ''')
+        expected = [{
+            'interface': 'eth0',
+            'fixed-address': '192.168.122.89',
+            'renew': '4 2019/05/02 18:30:02',
+            'options': {
+                'subnet-mask': '255.255.255.0',
+                'routers': '192.168.122.1',
+            },
+        }]
+        self.assertEqual(expected, utils.parse_dhclient_leases_file(content))
+
+    def test_utils_sane_block_devices_passes_match_to_udev(self):
+        good = {'MAJOR': '8'}
+        context = Mock()
+        context.list_devices.return_value = [good, {}]
+        self.assertEqual(
+            [good], list(utils.sane_block_devices(context, DM_UUID='LVM*')))
+        context.list_devices.assert_called_once_with(subsystem='block',
+                                                     DM_UUID='LVM*')
+
 
 @contextlib.contextmanager
 def create_script(content):
@@ -81,16 +144,20 @@ def create_script(content):
 class ProbertTestRun(unittest.TestCase):
     leader = 'DEBUG:probert.utils:'
 
+    def _run_with_output(self, stdout, stderr='', returncode=0):
+        # only the logging of the results is under test here, so skip
+        # the fork and exec; test_run_failure runs a real script
+        cmd = ['script', 'a', 'b', 'c']
+        cp = subprocess.CompletedProcess(args=cmd, returncode=returncode,
+                                         stdout=stdout, stderr=stderr)
+        with patch('probert.utils.subprocess.run', return_value=cp):
+            return utils.run(cmd)
+
     def test_run_success_no_output(self):
-        content = '''\
-            #!/bin/sh
-            exit 0
-        '''
         with self.assertLogs('probert.utils', level=logging.DEBUG) as m_logs:
-            with create_script(content) as script:
-                actual = utils.run([script, 'a', 'b', 'c'])
+            actual = self._run_with_output('')
             expected = [self.leader + line for line in (
-                f'Command `{script} a b c` exited with result: 0',
+                'Command `script a b c` exited with result: 0',
                 '<empty stdout>',
                 '<empty stderr>',
                 '--------------------------------------------------',
@@ -99,17 +166,10 @@ class ProbertTestRun(unittest.TestCase):
             self.assertEqual(expected, m_logs.output)
 
     def test_run_success_no_stderr(self):
-        content = '''\
-            #!/bin/sh
-            echo "Line 1"
-            echo "Line 2"
-            exit 0
-        '''
         with self.assertLogs('probert.utils', level=logging.DEBUG) as m_logs:
-            with create_script(content) as script:
-                actual = utils.run([script, 'a', 'b', 'c'])
+            actual = self._run_with_output('Line 1\nLine 2\n')
             expected = [self.leader + line for line in (
-                f'Command `{script} a b c` exited with result: 0',
+                'Command `script a b c` exited with result: 0',
                 'stdout: ------------------------------------------',
                 'Line 1',
                 'Line 2',
@@ -120,16 +180,10 @@ class ProbertTestRun(unittest.TestCase):
             self.assertEqual(expected, m_logs.output)
 
     def test_run_empty_output(self):
-        content = '''\
-            #!/bin/sh
-            echo
-            exit 0
-        '''
         with self.assertLogs('probert.utils', level=logging.DEBUG) as m_logs:
-            with create_script(content) as script:
-                actual = utils.run([script, 'a', 'b', 'c'])
+            actual = self._run_with_output('\n')
             expected = [self.leader + line for line in (
-                f'Command `{script} a b c` exited with result: 0',
+                'Command `script a b c` exited with result: 0',
                 'stdout: ------------------------------------------',
                 '',
                 '<empty stderr>',
@@ -139,17 +193,11 @@ class ProbertTestRun(unittest.TestCase):
             self.assertEqual(expected, m_logs.output)
 
     def test_run_success_with_stderr(self):
-        content = '''\
-            #!/bin/sh
-            echo "Success message"
-            echo "Diagnostic info" 1>&2
-            exit 0
-        '''
         with self.assertLogs('probert.utils', level=logging.DEBUG) as m_logs:
-            with create_script(content) as script:
-                actual = utils.run([script, 'a', 'b', 'c'])
+            actual = self._run_with_output('Success message\n',
+                                           'Diagnostic info\n')
             expected = [self.leader + line for line in (
-                f'Command `{script} a b c` exited with result: 0',
+                'Command `script a b c` exited with result: 0',
                 'stdout: ------------------------------------------',
                 'Success message',
                 'stderr: ------------------------------------------',
@@ -0,0 +1,175 @@
+import io
+import subprocess
+import textwrap
+import unittest
+from unittest import mock
+
+from probert import zfs
+
+
+ZDB_OUTPUT = textwrap.dedent('''\
+    hogshead:
+        version: 5000
+        name: 'hogshead'
+        vdev_tree:
+            type: 'root'
+            id: 0
+            children[0]:
+                type: 'raidz'
+                ashift: 12
+                children[0]:
+                    type: 'disk'
+                    path: '/dev/disk/by-id/usb-ST4000VN-0:0-part1'
+                    com.delphix:vdev_zap_leaf: 231
+                children[1]:
+                    type: 'disk'
+                    path: '/dev/disk/by-id/usb-ST4000VN-0:1-part1'
+                    com.delphix:vdev_zap_leaf: 232
+        errata: 0
+    ''')
+
+ZDB_DICT = {
+    'hogshead': {
+        'version': '5000',
+        'name': 'hogshead',
+        'vdev_tree': {
+            'type': 'root',
+            'id': '0',
+            'children[0]': {
+                'type': 'raidz',
+                'ashift': '12',
+                'children[0]': {
+                    'type': 'disk',
+                    'path': '/dev/disk/by-id/usb-ST4000VN-0:0-part1',
+                    'com.delphix:vdev_zap_leaf': '231',
+                },
+                'children[1]': {
+                    'type': 'disk',
+                    'path': '/dev/disk/by-id/usb-ST4000VN-0:1-part1',
+                    'com.delphix:vdev_zap_leaf': '232',
+                },
+            },
+        },
+        'errata': '0',
+    },
+}
+
+
+class TestZfs(unittest.TestCase):
+
+    @mock.patch('probert.zfs.subprocess.run')
+    def test_zfs_list_filesystems(self, m_run):
+        # zfs output is decoded by subprocess.run
+        m_run.return_value = subprocess.CompletedProcess(
+            args=['zfs'], returncode=0, stderr=None,
+            stdout='rpool\t100\t200\t96\t/\n'
+                   'rpool/ROOT\t1\t2\t3\tnone\n')
+        self.assertEqual(
+            [zfs.ZfsListEntry('rpool', '100', '200', '96', '/'),
+             zfs.ZfsListEntry('rpool/ROOT', '1', '2', '3', None)],
+            zfs.zfs_list_filesystems())
+
+    def test_parse_zdb_output(self):
+        self.assertEqual(ZDB_DICT, zfs.parse_zdb_output(ZDB_OUTPUT))
+
+    def test_parse_zdb_output_colon_in_key(self):
+        # only ': ' separates key and value, a bare ':' belongs to the key
+        disk = zfs.parse_zdb_output(ZDB_OUTPUT)['hogshead']['vdev_tree'][
+            'children[0]']['children[1]']
+        self.assertEqual('232', disk['com.delphix:vdev_zap_leaf'])
+        self.assertEqual('/dev/disk/by-id/usb-ST4000VN-0:1-part1',
+                         disk['path'])
+
+    def test_parse_zdb_output_steps_back_up(self):
+        data = textwrap.dedent('''\
+            rpool:
+                vdev_tree:
+                    children[0]:
+                        children[0]:
+                            type: 'disk'
+                errata: 0
+                features_for_read:
+                    com.delphix:hole_birth: 1
+            ''')
+        self.assertEqual(
+            {'rpool': {
+                'vdev_tree': {'children[0]': {'children[0]': {
+                    'type': 'disk'}}},
+                'errata': '0',
+                'features_for_read': {'com.delphix:hole_birth': '1'},
+            }},
+            zfs.parse_zdb_output(data))
+
+    def test_parse_zdb_output_lines(self):
+        # a pipe yields lines that still end with '\n'
+        lines = ZDB_OUTPUT.splitlines(keepends=True)
+        self.assertEqual(zfs.parse_zdb_output(ZDB_OUTPUT),
+                         zfs.parse_zdb_output(lines))
+
+    @mock.patch('probert.zfs.os.path.exists')
+    @mock.patch('probert.zfs.subprocess.Popen')
+    def test_zdb_asdict_reads_zdb(self, m_popen, m_exists):
+        m_exists.return_value = True
+        proc = m_popen.return_value.__enter__.return_value
+        proc.stdout = io.StringIO(ZDB_OUTPUT)
+        self.assertEqual(ZDB_DICT, zfs.zdb_asdict())
+        m_popen.assert_called_once_with(['zdb'], stdout=subprocess.PIPE,
+                                        stderr=subprocess.DEVNULL,
+                                        encoding='utf-8')
+
+    @mock.patch('probert.zfs.os.path.exists')
+    @mock.patch('probert.zfs.subprocess.Popen')
+    def test_zdb_asdict_no_cachefile(self, m_popen, m_exists):
+        m_exists.return_value = False
+        proc = m_popen.return_value.__enter__.return_value
+        proc.stdout = io.StringIO('')
+        self.assertEqual({}, zfs.zdb_asdict())
+        self.assertEqual(['zdb', '-e'], m_popen.call_args.args[0])
+
+    @mock.patch('probert.zfs.subprocess.Popen')
+    def test_zdb_asdict_no_zdb(self, m_popen):
+        m_popen.side_effect = FileNotFoundError
+        self.assertEqual({}, zfs.zdb_asdict())
+
+    @mock.patch('probert.zfs.subprocess.Popen')
+    def test_zdb_asdict_given_data(self, m_popen):
+        self.assertEqual(ZDB_DICT, zfs.zdb_asdict(ZDB_OUTPUT))
+        m_popen.assert_not_called()
+
+
+class TestZfsProbe(unittest.IsolatedAsyncioTestCase):
+
+    @mock.patch('probert.zfs.zfs_get_properties')
+    @mock.patch('probert.zfs.zfs_list_filesystems')
+    @mock.patch('probert.zfs.zdb_asdict')
+    async def test_probe_groups_datasets_by_pool(self, m_zdb, m_list,
+                                                 m_props):
+        m_zdb.return_value = {'rpool': {'version': '5000'},
+                              'bpool': {'version': '5000'}}
+        m_list.return_value = [
+            zfs.ZfsListEntry(name, '0', '0', '0', None)
+            for name in ('rpool', 'rpool/ROOT', 'bpool', 'other/fs')]
+        m_props.side_effect = lambda name: {name: {'properties': {}}}
+
+        result = await zfs.probe()
+
+        m_list.assert_called_once_with()
+        self.assertEqual(
+            ['bpool', 'rpool', 'rpool/ROOT'],
+            sorted(call.args[0] for call in m_props.call_args_list))
+        self.assertEqual(
+            {'zpools': {
+                'rpool': {'zdb': {'version': '5000'},
+                          'datasets': {'rpool': {'properties': {}},
+                                       'rpool/ROOT': {'properties': {}}}},
+                'bpool': {'zdb': {'version': '5000'},
+                          'datasets': {'bpool': {'properties': {}}}},
+            }},
+            result)
+
+    @mock.patch('probert.zfs.zfs_list_filesystems')
+    @mock.patch('probert.zfs.zdb_asdict')
+    async def test_probe_no_pools_skips_list(self, m_zdb, m_list):
+        m_zdb.return_value = {}
+        self.assertEqual({'zpools': {}}, await zfs.probe())
+        m_list.assert_not_called()
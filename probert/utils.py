@@ -1,5 +1,4 @@
 import asyncio
-from copy import deepcopy
 import glob
 import itertools
 import logging
@@ -8,6 +7,7 @@ import re
 import shlex
 import subprocess
 from subprocess import PIPE
+import weakref
 
 import pyudev
 
@@ -33,6 +33,18 @@ NET_CONFIG_BRIDGE_OPTIONS = [
 # https://github.com/torvalds/linux/blob/6f0d349d922ba44e4348a17a78ea51b7135965b1/include/linux/types.h#L125
 SECTOR_SIZE_BYTES = 512
 
+# Upper bound on the number of subprocesses arun() keeps running at once,
+# so that probes running in parallel do not fork one command per device
+# all at the same time.
+MAX_CONCURRENT_SUBPROCESSES = (os.cpu_count() or 1) * 2
+
+# the body of each lease { ... } block in a dhclient leases file
+DHCLIENT_LEASE = re.compile(r'{([^{}]*)}')
+
+# asyncio primitives bind to the event loop they are first used with, so
+# keep one semaphore per running loop.
+_subprocess_semaphores = weakref.WeakKeyDictionary()
+
 
 def _clean_env(env):
     if env is None:
@@ -69,14 +81,24 @@ def run(cmdarr, env=None, **kw):
     return None
 
 
+def _subprocess_semaphore():
+    loop = asyncio.get_running_loop()
+    sem = _subprocess_semaphores.get(loop)
+    if sem is None:
+        sem = asyncio.Semaphore(MAX_CONCURRENT_SUBPROCESSES)
+        _subprocess_semaphores[loop] = sem
+    return sem
+
+
 async def arun(cmdarr, env=None, **kw):
     """Run the given, with stdout, stderr, and return code always logged.
     Returns the stdout on command success, or None on command failure."""
     env = _clean_env(env)
-    sp = await asyncio.create_subprocess_exec(
-            *cmdarr, env=env, stdout=PIPE, stderr=PIPE, **kw)
+    async with _subprocess_semaphore():
+        sp = await asyncio.create_subprocess_exec(
+                *cmdarr, env=env, stdout=PIPE, stderr=PIPE, **kw)
+        stdout, stderr = await sp.communicate()
     display_cmd = shlex.join(cmdarr)
-    stdout, stderr = await sp.communicate()
     rc = sp.returncode
 
     stdout = stdout.decode('utf-8')
@@ -93,64 +115,57 @@ async def arun(cmdarr, env=None, **kw):
 
 # from juju-deployer utils.relation_merge
 def dict_merge(onto, source):
-    target = deepcopy(onto)
+    """ Return a merge of source onto onto.  Neither input is modified:
+        the result is always a new object, and only the dicts along merged
+        paths are copied, so it shares every value that is not merged with
+        onto or source."""
     # Support list of relations targets
     if isinstance(onto, list) and isinstance(source, list):
-        target.extend(source)
-        return target
-    for (key, value) in source.items():
-        if key in target:
-            if isinstance(target[key], dict) and isinstance(value, dict):
-                target[key] = dict_merge(target[key], value)
-            elif isinstance(target[key], list) and isinstance(value, list):
-                target[key] = list(set(target[key] + value))
-        else:
-            target[key] = value
+        return onto + source
+    target = dict(onto)
+    # walk nested dicts with an explicit stack of (copy, source) pairs
+    # rather than recursing once per level
+    pending = [(target, source)]
+    while pending:
+        merged, merging = pending.pop()
+        for (key, value) in merging.items():
+            if key in merged:
+                current = merged[key]
+                if isinstance(current, dict) and isinstance(value, dict):
+                    if not value:
+                        continue
+                    merged[key] = dict(current)
+                    pending.append((merged[key], value))
+                elif isinstance(current, list) and isinstance(value, list):
+                    # drop duplicates but keep the order items came in
+                    merged[key] = list(
+                        dict.fromkeys(itertools.chain(current, value)))
+            else:
+                merged[key] = value
     return target
 
 
+def _decode_attributes(attributes, keys):
+    r = {}
+    for key in keys:
+        val = attributes.get(key)
+        if isinstance(val, bytes):
+            val = val.decode('utf-8', 'replace')
+        r[key] = val
+    return r
+
+
+# device.attributes builds a new Attributes object on every access, so
+# fetch it once per device rather than once per attribute.
 if pyudev.__version_info__ < (0, 18):
     def udev_get_attributes(device):
-        r = {}
-        for key in device.attributes:
-            val = device.attributes.get(key)
-            if isinstance(val, bytes):
-                val = val.decode('utf-8', 'replace')
-            r[key] = val
-        return r
+        attributes = device.attributes
+        return _decode_attributes(attributes, attributes)
 else:
     def udev_get_attributes(device):
-        r = {}
-        for key in device.attributes.available_attributes:
-            val = device.attributes.get(key)
-            if isinstance(val, bytes):
-                val = val.decode('utf-8', 'replace')
-            r[key] = val
-        return r
-
-
-# split lists into N lists by predicate
-def partitionn2(items, predicate=int, n=2):
-    return ((lambda i, tee: (item for pred, item in tee if pred == i))(x, t)
-            for x, t in enumerate(itertools.tee(((predicate(item), item)
-                                  for item in items), n)))
-
-
-# unpack generators into key, value pair
-# where key is first item (list[0]) and
-# value is remainder (list[1:])
-def partition_to_pair(input):
-    """Unpack a partition into a tuple of (first partition, second partition)
-
-    param: partition iterator from partitionn2
-    """
-    items = input.split()
-    partitions = partitionn2(items=items,
-                             predicate=lambda x: items.index(x) != 0,
-                             n=2)
-    data = [list(p) for p in partitions]
-    [key], value = data
-    return key, value
+        attributes = device.attributes
+        return _decode_attributes(attributes,
+                                  attributes.available_attributes)
 
 
 def disentagle_data_from_whitespace(data):
@@ -170,12 +185,11 @@ def dictify_lease(lease):
         if len(line) <= 0:
             continue
 
-        key, value = partition_to_pair(line)
+        key, *value = line.split()
         if key == 'option':
-            options.update({value[0]: value[1]})
+            options[value[0]] = value[1]
         else:
-            value = " ".join(value)
-            lease_dict.update({key: value})
+            lease_dict[key] = " ".join(value)
 
     lease_dict.update({'options': options})
     return lease_dict
@@ -187,7 +201,7 @@ def parse_dhclient_leases_file(leasedata):
     :param leasesdata: string of lease data read from leases file
     """
     return [dictify_lease(lease) for lease in
-            re.findall(r'{([^{}]*)}', leasedata.replace('"', ''))]
+            DHCLIENT_LEASE.findall(leasedata.replace('"', ''))]
 
 
 def parse_networkd_lease_file(leasedata):
@@ -295,21 +309,23 @@ def parse_etc_network_interfaces(ifaces, contents, path):
 
 def read_sys_block_size_bytes(device):
     """ /sys/class/block/<device>/size and return integer value in bytes"""
-    device_dir = os.path.join('/sys/class/block', os.path.basename(device))
-    blockdev_size = os.path.join(device_dir, 'size')
+    blockdev_size = '/sys/class/block/%s/size' % os.path.basename(device)
     with open(blockdev_size) as d:
-        size = int(d.read().strip()) * SECTOR_SIZE_BYTES
+        # int() ignores the surrounding whitespace itself
+        size = int(d.read()) * SECTOR_SIZE_BYTES
 
     return size
 
 
 def read_sys_block_slaves(device):
-    device_dir = os.path.join('/sys/class/block', os.path.basename(device))
-    return os.listdir(os.path.join(device_dir, 'slaves'))
+    return os.listdir(
+        '/sys/class/block/%s/slaves' % os.path.basename(device))
 
 
-def sane_block_devices(context):
-    for device in context.list_devices(subsystem='block'):
+def sane_block_devices(context, **match):
+    """ Yield block devices from context.  Any keyword arguments are
+        passed to list_devices, so property filters run inside libudev."""
+    for device in context.list_devices(subsystem='block', **match):
         if "MAJOR" not in device:
             # Shouldn't happen but apparently does! (LP: #1868109)
             continue
@@ -12,14 +12,15 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import asyncio
 from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+import csv
 import logging
-import operator
 import os
-import re
 import subprocess
-from functools import reduce
 
+from probert.utils import MAX_CONCURRENT_SUBPROCESSES
 
 log = logging.getLogger('probert.zfs')
 ZfsListEntry = namedtuple('ZfsListEntry',
@@ -27,7 +28,9 @@ ZfsListEntry = namedtuple('ZfsListEntry',
 
 
 def parse_zdb_output(data):
-    """ Parse structured zdb output into a dictionary.
+    """ Parse structured zdb output into a dictionary.  data may be the
+    whole output as a string or any iterable of its lines, such as a
+    pipe from a running zdb.
 
     hogshead:
         version: 5000
@@ -59,25 +62,18 @@ def parse_zdb_output(data):
                     com.delphix:vdev_zap_leaf: 232
     """
 
-    def get_from_dict(datadict, maplist):
-        return reduce(operator.getitem, maplist, datadict)
-
-    def set_in_dict(datadict, maplist, value):
-        get_from_dict(datadict, maplist[:-1])[maplist[-1]] = value
-
     def parse_line_key_value(line):
         """ use ': ' token to split line into key, value pairs
 
         com.delphi:vdev_zap_top: 230
                                ^^
-                                `- span() = (24, 26)
+                                `- find() = 24
         key = 'com.delphi:vdev_zap_top'
         value = '230'
         """
-        match = re.search(r': ', line)
-        if match:
-            tok_start, tok_end = match.span()
-            key, value = (line[:tok_start], line[tok_end:])
+        tok_start = line.find(': ')
+        if tok_start >= 0:
+            key, value = (line[:tok_start], line[tok_start + 2:])
         else:
             key, value = line.split(':')
 
@@ -90,24 +86,28 @@ def parse_zdb_output(data):
     root = {}
     lvl_tok = 4
     prev_item = []
-    for line in data.splitlines():
+    if isinstance(data, str):
+        data = data.splitlines()
+    for line in data:
+        line = line.rstrip('\n')
         current_level = int((len(line) - len(line.lstrip(' '))) / lvl_tok)
-        prev_level = len(prev_item) - 1
         key, value = parse_line_key_value(line)
         # TODO: handle children[N] keyname an convert to list
         if current_level == 0:
             root[key] = {}
             prev_item = [(current_level, key)]
         else:
-            new_item_path = [item[1]
-                             for item in prev_item[0: current_level]] + [key]
+            # walk down to the parent dict of this key
+            parent = root
+            for _, parent_key in prev_item[0: current_level]:
+                parent = parent[parent_key]
             if value:
-                set_in_dict(root, new_item_path, value)
+                parent[key] = value
             else:
-                set_in_dict(root, new_item_path, {})
-                # we've dropped down a level, replace prev level key w/new key
-                if current_level == prev_level:
-                    prev_item.pop()
+                parent[key] = {}
+                # forget the keys at this level and below, which may be
+                # several levels deeper if we have just stepped back up
+                del prev_item[current_level:]
                 prev_item.append((current_level, key))
 
     return root
@@ -120,38 +120,41 @@ def zdb_asdict(data=None):
         # exported, altroot, and uncached pools need -e
         if not os.path.exists('/etc/zfs/zpool.cache'):
             cmd.append('-e')
+        # parse the dump as it streams in rather than holding all of it
         try:
-            result = subprocess.run(cmd, stdout=subprocess.PIPE,
-                                    stderr=subprocess.DEVNULL)
+            with subprocess.Popen(cmd, stdout=subprocess.PIPE,
+                                  stderr=subprocess.DEVNULL,
+                                  encoding='utf-8') as proc:
+                return parse_zdb_output(proc.stdout)
         except (subprocess.CalledProcessError, FileNotFoundError):
             return {}
 
-        data = result.stdout.decode('utf-8')
-
     return parse_zdb_output(data)
 
 
+def _split_tabs(data):
+    """ Split tab separated zfs -H output into rows of fields.  zfs does
+    not quote its values, so quote characters are kept as they are."""
+    return csv.reader(data.splitlines(), delimiter='\t',
+                      quoting=csv.QUOTE_NONE)
+
+
 def zfs_list_filesystems(raw_output=False):
     cmd = ['zfs', 'list', '-Hp', '-t', 'filesystem']
     try:
         result = subprocess.run(cmd, stdout=subprocess.PIPE,
-                                stderr=subprocess.DEVNULL)
-    except subprocess.CalledProcessError:
+                                stderr=subprocess.DEVNULL, encoding='utf-8')
+    except (subprocess.CalledProcessError, FileNotFoundError):
         return []
 
-    data = result.stdout.decode('utf-8')
+    data = result.stdout
     if raw_output:
         return data
 
     # NAME, USED, AVAIL, REFER, MOUNTPOINT
-    zfs_entries = []
-    for line in data.splitlines():
-        (name, used, avail, refer, mpoint) = line.split('\t')
-        if mpoint == 'none':
-            mpoint = None
-        zfs_entries.append(ZfsListEntry(name, used, avail, refer, mpoint))
-
-    return zfs_entries
+    return [ZfsListEntry(name, used, avail, refer,
+                         None if mpoint == 'none' else mpoint)
+            for (name, used, avail, refer, mpoint) in _split_tabs(data)]
 
 
 def zfs_get_properties(zfs_name, raw_output=False):
@@ -161,19 +164,17 @@ def zfs_get_properties(zfs_name, raw_output=False):
     cmd = ['zfs', 'get', 'all', '-Hp', zfs_name]
     try:
         result = subprocess.run(cmd, stdout=subprocess.PIPE,
-                                stderr=subprocess.DEVNULL)
-    except subprocess.ProcessExecutionError:
+                                stderr=subprocess.DEVNULL, encoding='utf-8')
+    except (subprocess.CalledProcessError, FileNotFoundError):
         return []
 
-    data = result.stdout.decode('utf-8')
+    data = result.stdout
     if raw_output:
         return data
 
     # NAME, PROPERTY, VALUE, SOURCE
-    zprops = {}
-    for line in data.splitlines():
-        (name, prop, value, source) = line.split('\t')
-        zprops[prop] = {'value': value, 'source': source}
+    zprops = {prop: {'value': value, 'source': source}
+              for (name, prop, value, source) in _split_tabs(data)}
 
     return {zfs_name: {'properties': zprops}}
 
@@ -182,6 +183,34 @@ def is_zfs_device(device):
     return device.get('ID_FS_TYPE') == 'zfs_member'
 
 
+def _probe():
+    zdb = zdb_asdict()
+    if not zdb:
+        return {'zpools': {}}
+
+    # list the filesystems once and file each under its pool, rather
+    # than listing every filesystem again for each pool
+    pool_filesystems = {zpool: [] for zpool in zdb}
+    for zfs_entry in zfs_list_filesystems():
+        zpool = zfs_entry.name.partition('/')[0]
+        if zpool in pool_filesystems:
+            pool_filesystems[zpool].append(zfs_entry.name)
+
+    # each 'zfs get' is a separate command, run them side by side
+    names = [name for names in pool_filesystems.values() for name in names]
+    with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_SUBPROCESSES) as pool:
+        properties = dict(zip(names, pool.map(zfs_get_properties, names)))
+
+    zpools = {}
+    for zpool, zdb_dump in zdb.items():
+        datasets = {}
+        for name in pool_filesystems[zpool]:
+            datasets.update(properties[name])
+        zpools[zpool] = {'zdb': zdb_dump, 'datasets': datasets}
+
+    return {'zpools': zpools}
+
+
 async def probe(context=None, **kw):
     """The ZFS prober examines the ZFS Dubugger (zdb) output which
     produces psuedo-json output.  This is converted to a dictionary
@@ -196,13 +225,5 @@ async def probe(context=None, **kw):
     The resulting output includes the converted zdb dump and
     a tree of datasets and their properties.
     """
-    zdb = zdb_asdict()
-    zpools = {}
-    for zpool, zdb_dump in zdb.items():
-        datasets = {}
-        zlf = zfs_list_filesystems()
-        for zfs_entry in zlf:
-            datasets.update(zfs_get_properties(zfs_entry.name))
-        zpools[zpool] = {'zdb': zdb_dump, 'datasets': datasets}
-
-    return {'zpools': zpools}
+    return await asyncio.get_running_loop().run_in_executor(
+            None, _probe)